@@ -5,7 +5,10 @@
 # auther      : papsdroid
 # modification: 2019/09/18
 ########################################################################
-import time, unicornhathd
+import time, functools
+import numpy
+from sysdroid_display import UnicornDisplay
+from sysdroid_layout import Layout, graph_layout
 
 #classe pour afficher des msg à partir de codes binaires représantant chaque lettre en 5*3
 #-----------------------------------------------------------------------------------------
@@ -59,7 +62,20 @@ class Msg():
             "*" : [0b01010, 0b00100, 0b01010],  # "*"
             " " : [ 0, 0, 0]                    # " "
         }
+        #bitmaps précompilées de chaque caractère, colonne de séparation comprise: tableau (largeur, 5) de booléens
+        #bitmap[x][y] = True si le pixel (x,y) est allumé, y=0 en bas
+        self.glyphs = {k: self.compile_glyph(codes) for k, codes in self.font5x3.items()}
+        #cache LRU des textes déjà rendus (ex: la T° CPU qui change peu)
+        self.render = functools.lru_cache(maxsize=64)(self.render_msg)
 
+    # convertit une liste de codes binaires 5b en bitmap (largeur+1, 5), colonne vide de séparation ajoutée
+    #-------------------------------------------------------------------------------------------------------
+    def compile_glyph(self, codes):
+        bitmap = numpy.zeros((len(codes)+1, 5), dtype=bool)
+        for x, n5b in enumerate(codes):
+            bitmap[x] = [(n5b >> y) & 1 for y in range(5)]
+        bitmap.flags.writeable = False
+        return bitmap
           
     # génère la liste des codes binaires correspondant à un texte
     # chaque code binaire sur 5b représente 5 pixels verticaux à allumer (1) ou étteindre(0)
@@ -68,19 +84,223 @@ class Msg():
     #-----------------------------------------------------------------------------------------------------------
     def create_msg(self, text):
         matrix= []
-        for i in range(len(text)):
-            if text[i].upper() in self.font5x3: # recherche dans le dictionnaire l'existance du charactère
-                matrix = matrix + self.font5x3[text[i].upper()]     # ajout des codes binaires correpondant à la lettre
-                matrix = matrix + [0]                              # ajout d'une colonne vide pour séparrer chaque lettre.
+        for char in text.upper():
+            codes = self.font5x3.get(char)  # recherche dans le dictionnaire l'existance du charactère
+            if codes is not None:
+                matrix.extend(codes)        # ajout des codes binaires correpondant à la lettre
+                matrix.append(0)            # ajout d'une colonne vide pour séparrer chaque lettre.
         return matrix
 
+    # génère le masque (largeur, 5) de booléens d'un texte à partir des bitmaps précompilées
+    # width: largeur du masque (texte tronqué ou complété par des colonnes vides), largeur du texte si None
+    # utiliser self.render(text, width) qui met le résultat en cache: le masque retourné est en lecture seule
+    #-----------------------------------------------------------------------------------------------------------
+    def render_msg(self, text, width=None):
+        glyphs = [self.glyphs[char] for char in text.upper() if char in self.glyphs]
+        mask = numpy.concatenate(glyphs) if glyphs else numpy.zeros((0, 5), dtype=bool)
+        if width is not None:
+            mask = numpy.concatenate([mask, numpy.zeros((max(0, width-len(mask)), 5), dtype=bool)])[:width]
+        mask.flags.writeable = False
+        return mask
+
+#table des couleurs précalculées des jauges: niveau (0 à 100%) x palier de luminosité (v = palier/V_STEPS)
+#V_STEPS=60 est divisible par 1 à 6: tous les dégradés des jauges (k/n, n<=6) et la luminosité 0.7
+#des titres tombent exactement sur un palier. Table construite une seule fois au démarrage.
+#-----------------------------------------------------------------------------------------
+class ColorTable():
+    V_STEPS = 60
+
+    def __init__(self, hue_min=0.33, hue_max=1.0):
+        self.hue_min = hue_min              # color HSV: vert pour un niveau 0%
+        self.hue_max = hue_max              # color HSV: rouge pour un niveau 100%
+        hue_delta = hue_max - hue_min
+        h = numpy.array([hue_min + level/100*hue_delta for level in range(101)])[:, numpy.newaxis]
+        v = numpy.arange(self.V_STEPS+1)[numpy.newaxis, :] / self.V_STEPS
+        #conversion HSV -> RVB vectorisée, mêmes calculs que colorsys.hsv_to_rgb avec s=1.0
+        i = (h*6.0).astype(int)
+        f = (h*6.0) - i
+        p = numpy.zeros_like(v)
+        q = v*(1.0-f)
+        t = v*(1.0-(1.0-f))
+        v = numpy.broadcast_to(v, q.shape)
+        i = numpy.broadcast_to(i % 6, q.shape)
+        r = numpy.choose(i, [v, q, p, p, t, v])
+        g = numpy.choose(i, [t, v, v, q, p, p])
+        b = numpy.choose(i, [p, p, t, v, v, q])
+        self.rgb = (numpy.stack([r, g, b], axis=2)*255).astype(numpy.uint8)  # rgb[niveau, palier] = [r,v,b]
+
+    #index dans la table d'un niveau (%), arrondi et borné à 0..100
+    #--------------------------------------------------------------
+    def level(self, level):
+        return min(100, max(0, int(round(level))))
+
+    #index dans la table d'un tableau de niveaux (%)
+    #-----------------------------------------------
+    def levels(self, levels):
+        return numpy.clip(numpy.rint(levels), 0, 100).astype(int)
+
+    #palier de luminosité le plus proche de v (0.0 à 1.0)
+    #----------------------------------------------------
+    def step(self, v):
+        return int(round(v*self.V_STEPS))
+
+    #couleur [r,v,b] d'un niveau (%) à la luminosité v
+    #-------------------------------------------------
+    def color(self, level, v=1.0):
+        return self.rgb[self.level(level), self.step(v)]
+
+#classe image hors écran 16x16 (x|colonne, y|lignes) au format numpy uint8 [r,v,b]
+#la dernière image envoyée à l'afficheur (sysdroid_display) est conservée: show() n'est appelé que si l'image a changé
+#-----------------------------------------------------------------------------------------
+class FrameBuffer():
+    def __init__(self, display, width=16, height=16):
+        self.display = display      # afficheur: UnicornDisplay, SimDisplay...
+        self.width = width
+        self.height = height
+        self.buf = numpy.zeros((width, height, 3), dtype=numpy.uint8)   # image en cours de dessin
+        self.last = numpy.zeros((width, height, 3), dtype=numpy.uint8)  # dernière image envoyée à la matrice
+
+    #efface l'image en cours (pixels noirs)
+    #--------------------------------------
+    def clear(self):
+        self.buf.fill(0)
+
+    #rectangle plein en pos (x0,y0),(x1,y1) inclus, de couleur c=[r,v,b]
+    #--------------------------------------------------------------------
+    def fill(self, x0, y0, x1, y1, c):
+        self.buf[x0:x1+1, y0:y1+1] = c
+
+    #rectangle creux en pos (x0,y0),(x1,y1) inclus, de couleur c=[r,v,b]
+    #--------------------------------------------------------------------
+    def box(self, x0, y0, x1, y1, c):
+        self.buf[x0:x1+1, (y0, y1)] = c
+        self.buf[(x0, x1), y0:y1+1] = c
+
+    #copie une image img (tableau largeur x hauteur x 3) en pos (x,y)
+    #si mask (tableau largeur x hauteur de booléens) est fourni, seuls les pixels à True sont copiés
+    #----------------------------------------------------------------------------------------------
+    def blit(self, x, y, img, mask=None):
+        w, h = img.shape[0], img.shape[1]
+        if mask is None:
+            self.buf[x:x+w, y:y+h] = img
+        else:
+            self.buf[x:x+w, y:y+h][mask] = img[mask]
+
+    #dégradé: colors (liste de n couleurs [r,v,b]) appliquées à partir de (x,y) sur n pixels
+    #axis=1: dégradé vertical (bas vers haut) sur 'size' colonnes, axis=0: dégradé horizontal sur 'size' lignes
+    #---------------------------------------------------------------------------------------------------------
+    def gradient(self, x, y, colors, axis=1, size=1):
+        colors = numpy.asarray(colors, dtype=numpy.uint8).reshape(-1, 3)
+        n = len(colors)
+        if n == 0:
+            return
+        if axis == 1:
+            self.buf[x:x+size, y:y+n] = colors[numpy.newaxis, :, :]
+        else:
+            self.buf[x:x+n, y:y+size] = colors[:, numpy.newaxis, :]
+
+    #zone modifiée depuis le dernier envoi: (x0,y0,x1,y1) inclus, None si l'image est inchangée
+    #-------------------------------------------------------------------------------------------
+    def dirty(self):
+        changed = (self.buf != self.last).any(axis=2)
+        xs = numpy.flatnonzero(changed.any(axis=1))
+        if len(xs) == 0:
+            return None
+        ys = numpy.flatnonzero(changed.any(axis=0))
+        return (xs[0], ys[0], xs[-1], ys[-1])
+
+    #envoie l'image à l'afficheur uniquement si elle a changé
+    #seule la zone modifiée est recopiée dans le buffer de l'afficheur
+    #retourne True si show() a été appelé (compté par Stats.rendered: images envoyées / évitées)
+    #------------------------------------------------------------------
+    def push(self):
+        zone = self.dirty()
+        if zone is None:
+            return False
+        x0, y0, x1, y1 = zone
+        self.display.write(x0, y0, self.buf[x0:x1+1, y0:y1+1])
+        self.display.show()
+        self.last[x0:x1+1, y0:y1+1] = self.buf[x0:x1+1, y0:y1+1]
+        return True
+
+    #synchronise l'image sur la matrice après un effacement direct de l'afficheur (clear/off)
+    #--------------------------------------------------------------------------------------
+    def reset(self):
+        self.buf.fill(0)
+        self.last.fill(0)
+
+#transition adoucie (ease in-out) entre les valeurs affichées et un nouveau relevé (namedtuple de nombres
+#et de tuples de nombres) en nb_frames images. La progression de chaque image est calculée une fois pour toutes,
+#les valeurs de toutes les images d'une transition sont calculées en une seule opération à l'arrivée du relevé
+#-----------------------------------------------------------------------------------------
+class Transition():
+    def __init__(self, nb_frames=1):
+        self.nb_frames = max(1, nb_frames)
+        t = numpy.arange(1, self.nb_frames+1) / self.nb_frames
+        self.weights = (t*t*(3-2*t))[:, numpy.newaxis]    # progression de chaque image (0 à 1)
+        self.info = None            # relevé cible
+        self.fields = []            # position de chaque champ du relevé dans les valeurs: index ou slice (tuple)
+        self.current = None         # valeurs de la dernière image (tableau numpy)
+        self.frames = None          # valeurs de chaque image de la transition (nb_frames x nb valeurs)
+        self.index = 0              # prochaine image de la transition
+        self.first = False          # True jusqu'à la première image d'un nouveau relevé
+
+    #démarre la transition vers le relevé info, depuis les valeurs de la dernière image
+    #----------------------------------------------------------------------------------
+    def start(self, info):
+        values, fields, pos = [], [], 0
+        for v in info:
+            if isinstance(v, tuple):
+                values.extend(v)
+                fields.append(slice(pos, pos+len(v)))
+                pos += len(v)
+            else:
+                values.append(v)
+                fields.append(pos)
+                pos += 1
+        values = numpy.array(values, dtype=float)
+        if self.current is None or fields != self.fields or numpy.array_equal(values, self.current):
+            self.frames = values[numpy.newaxis, :]  # premier relevé, nb de coeurs/disques modifié ou valeurs inchangées
+        else:
+            self.frames = numpy.round(self.current + (values - self.current)*self.weights, 1)
+            self.frames[-1] = values
+        self.info = info
+        self.fields = fields
+        self.index = 0
+        self.first = True
+
+    #True tant qu'il reste des images à afficher
+    #-------------------------------------------
+    def moving(self):
+        return self.frames is not None and self.index < len(self.frames)
+
+    #relevé (même type que info) de l'image suivante
+    #-----------------------------------------------
+    def next(self):
+        self.current = self.frames[self.index]
+        self.index += 1
+        self.first = False
+        if self.index == len(self.frames):
+            return self.info            # dernière image: relevé exact
+        values = self.current.tolist()
+        return self.info._make(tuple(values[f]) if isinstance(f, slice) else values[f] for f in self.fields)
+
 #classe affichage d'infos sur la Unicorn HAT HD
+#  graph: None, sinon nom de la mesure (champ de SysInfo) affichée en graphe défilant sur toute la matrice
+#  display: afficheur (sysdroid_display), Unicorn HAT HD si None
+#  layout: disposition des widgets (sysdroid_layout): liste, nom ('dashboard', 'temperature', 'io') ou fichier JSON
+#          tableau de bord si None
+#  fps: images par seconde des transitions entre 2 relevés (0: nouveau relevé affiché directement)
+#  transition: durée en secondes d'une transition
+#  history: historique de chaque mesure (dict nom: RingBuffer, ReadSys.history) affiché par les graphes défilants
+#  stats: mesures du coût de sysdroid (sysdroid_stats.Stats), relevés jamais affichés repris par les graphes défilants
 #-----------------------------------------------------------------------------------------
 class SysDroid_uhhd():
-    def __init__(self, rotation):
-        unicornhathd.brightness(0.6)
-        unicornhathd.clear()
-        unicornhathd.rotation(rotation)  #(x|colonne, y|lignes)  (0,0): en bas à gauche
+    def __init__(self, rotation, animation=True, nb_cpus=4, graph=None, display=None, layout=None, fps=0, transition=0.5, history=None, stats=None):
+        self.display = UnicornDisplay() if display is None else display
+        self.display.brightness(0.6)
+        self.display.clear()
+        self.display.rotation(rotation)  #(x|colonne, y|lignes)  (0,0): en bas à gauche
         self.c_gris_fonce = [20,20,10]
         self.c_rouge = [255,0,0]
         self.c_orange = [240,150,28]
@@ -89,161 +309,106 @@ class SysDroid_uhhd():
         self.c_jaune = [100,100,0]
         self.hue_min = 0.33                 # color HSV: vert pour un niveau 0%
         self.hue_max = 1.0                  # color HSV: rouge pour un niveau 100%
-        self.hue_delta = self.hue_max - self.hue_min     # calculé une fois pour toutes
+        self.colors = ColorTable(self.hue_min, self.hue_max)  # couleurs des jauges précalculées
         self.msg = Msg()
+        self.fb = FrameBuffer(self.display) # image hors écran, envoyée à la matrice par show()
+        self.fb.reset()
+        self.frame_delay = 0.05             # délais en secondes entre 2 images des animations
+        self.frame_period = 1/fps if fps else 0     # délais en secondes entre 2 images des transitions
+        self.transition = Transition(round(fps*transition))  # transition entre 2 relevés (1 image si fps=0)
+        self.nb_cpus = nb_cpus              # nb de coeurs CPU des jauges 'bars' avant le premier relevé
+        self.history = {} if history is None else history   # historique des mesures (graphes défilants)
+        self.stats = stats                  # compteurs de sysdroid (None: aucun)
+        self.layout = Layout(self, layout if graph is None else graph_layout(graph))  # widgets compilés en index de pixels
         
         #initialisation de l'affichage
-        self.animation_start()
-        self.draw_titles(self.c_orange) #dessine les titres persistants 4 premières lignes
-        self.draw_level(0,1,6)        #fond niveau CPU0
-        self.draw_level(0,2,6)        #fond niveau CPU1
-        self.draw_level(0,3,6)        #fond niveau CPU2
-        self.draw_level(0,4,6)        #fond niveau CPU3
-        self.draw_level(0,7,6)        #fond niveau RAM
-        self.draw_fullbox(10, 6, 14, 10 ,self.c_gris_fonce) #fond niveau DISK
-        self.draw_level(0,1,0)        #fond niveau T°
-        unicornhathd.show()
-
-    #affiche le buffer sur la matrice
-    #--------------------------------
+        if animation:
+            self.animation_start()
+            self.draw_background()
+
+    #dessine les titres et les fonds des niveaux
+    #-------------------------------------------
+    def draw_background(self):
+        self.fb.clear()
+        self.layout.background()
+        self.show()
+
+    #affiche le buffer sur la matrice (aucun envoi si l'image n'a pas changé)
+    #------------------------------------------------------------------------
     def show(self):
-        unicornhathd.show()
+        return self.fb.push()
         
     #extinction de la matrice UHHD
     #--------------------------------
     def stop(self):
         self.animation_quit()
-        unicornhathd.off()      
+        self.off()
+
+    #extinction immédiate de la matrice UHHD (sans animation)
+    #---------------------------------------------------------
+    def off(self):
+        self.display.off()
+        self.fb.reset()
 
     #dessine un rectangle plein en pos (x0,y0),(x1,y1) de couleur c=[r,v,b]
     #----------------------------------------------------------------------
     def draw_fullbox(self, x0, y0, x1, y1, c):
-        for x in range(x0, x1+1):
-            for y in range(y0, y1+1):
-                unicornhathd.set_pixel(x, y, c[0],c[1],c[2])
+        self.fb.fill(x0, y0, x1, y1, c)
 
     #dessine un rectangle creux en pos (x0,y0),(x1,y1) de couleur c=[r,v,b]
     #----------------------------------------------------------------------
     def draw_box(self, x0, y0, x1, y1, c):
-        for x in range(x0, x1+1):
-            unicornhathd.set_pixel(x, y0, c[0],c[1],c[2])
-            unicornhathd.set_pixel(x, y1, c[0],c[1],c[2])
-        for y in range(y0, y1+1):
-            unicornhathd.set_pixel(x0, y, c[0],c[1],c[2])
-            unicornhathd.set_pixel(x1, y, c[0],c[1],c[2])
+        self.fb.box(x0, y0, x1, y1, c)
 
     #animation de démarrage: rectangle grossissant
     #---------------------------------------------
     def animation_start(self):
-        for n in range(0,8):
-            unicornhathd.clear()
-            self.draw_box(7-n,7-n, 8+n,8+n, self.c_bleu)
-            unicornhathd.show() 
-            time.sleep(0.05)
+        for _ in self.frames_start():
+            time.sleep(self.frame_delay)
 
     #animation quitter: rectangle rétraississant
     #-------------------------------------------
     def animation_quit(self):
+        for _ in self.frames_quit():
+            time.sleep(self.frame_delay)
+
+    #images de l'animation de démarrage: générateur qui rend la main après l'affichage de chaque image
+    #-------------------------------------------------------------------------------------------------
+    def frames_start(self):
+        for n in range(0,8):
+            self.fb.clear()
+            self.draw_box(7-n,7-n, 8+n,8+n, self.c_bleu)
+            self.show()
+            yield n
+
+    #images de l'animation quitter: générateur qui rend la main après l'affichage de chaque image
+    #--------------------------------------------------------------------------------------------
+    def frames_quit(self):
         for n in range(0,8):
-            unicornhathd.clear()
+            self.fb.clear()
             self.draw_box(n,n, 15-n,15-n, self.c_bleu)
-            unicornhathd.show()    
-            time.sleep(0.05)
-
-    #dessine 3 pixels (code binaire 3bits) horizontale pos (x,y), couleur h=HUE
-    #---------------------------------------------------------------------------------------------
-    def draw_horiz_3b(self, n3b, x, y, h):
-        xb=0b100
-        for c in range(3):
-            if (xb & n3b) == xb :
-                unicornhathd.set_pixel_hsv(x+c,y,h, 1.0, 0.7)
-            else:
-                unicornhathd.set_pixel(x+c,y,0,0,0) #led noire éteinte
-            xb>>=1  #décalage 1b vers la droite
+            self.show()
+            yield n
 
-        
-    #dessine les titres persistants en haut de la matrice (4 premières lignes)
-    #-------------------------------------------------------------------------
-    def draw_titles(self, c):
-        unicornhathd.clear()
-        self.draw_title_P(self.hue_min)
-        self.draw_title_R(self.hue_min)
-        self.draw_title_D(self.hue_min)
-        unicornhathd.show()
-
-    def draw_title_P(self,h):
-        self.draw_horiz_3b(0b110,1,15,h)
-        self.draw_horiz_3b(0b101,1,14,h)
-        self.draw_horiz_3b(0b110,1,13,h)
-        self.draw_horiz_3b(0b100,1,12,h)
-
-    def draw_title_R(self,h):
-        self.draw_horiz_3b(0b110,6,15,h)
-        self.draw_horiz_3b(0b101,6,14,h)
-        self.draw_horiz_3b(0b110,6,13,h)
-        self.draw_horiz_3b(0b101,6,12,h)
-
-    def draw_title_D(self,h):
-        self.draw_horiz_3b(0b110,11,15,h)
-        self.draw_horiz_3b(0b101,11,14,h)
-        self.draw_horiz_3b(0b101,11,13,h)
-        self.draw_horiz_3b(0b110,11,12,h)       
-    
-
-    #caclule la couleur HUE: varie de 0.33(vert) à 1.00 (rouge) proportionnellement à level
-    #------------------------------------------------------------------
-    def hue_level(self, level): #level varie de 0 à 100
-        return (self.hue_min + level/100*self.hue_delta)
+    # affiche un relevé des informations système (SysInfo de sysdroid_main)
+    # advance=False: image intermédiaire d'une transition (graphes défilants non décalés)
+    #------------------------------------------------------------------------------------
+    def draw_info(self, info, advance=True):
+        self.layout.draw(info, advance)
+        return self.show()
 
-    # dessine une ligne verticale de niveau sur 5 pixels
-    # level: entier de 0 à 100 (%)
-    # couleur du fond: tous les pixels en gris
-    # couleur du niveau: variation de couleur du vert(0) au rouge (100)
-    #----------------------------------------------------------------------------------------------
-    def draw_level(self, level, x, y):
-        nb_p = int(level/20)        #nb de palliers de 20% atteints: 0 à 5
-        h = self.hue_level(level)   #HUE en fonction du level (0:vert à 100 rouge)
-        for i in range(5):
-            unicornhathd.set_pixel(x,y+i,self.c_gris_fonce[0],self.c_gris_fonce[1],self.c_gris_fonce[2])    # fond gris
-            if (level/20>i):
-                unicornhathd.set_pixel_hsv(x,y+i, self.hue_level(level), 1.0, (i+1)/(1+nb_p)) #dégradé bas(-) vers haut(+)
-                #unicornhathd.set_pixel_hsv(x,y+i, self.hue_level(level), 1.0, 1-i/(nb_p+1))    #dégradé bas(+) vers haut(-)
-        
-        
+    # démarre la transition vers un nouveau relevé (SysInfo)
+    #-------------------------------------------------------
+    def set_info(self, info):
+        self.transition.start(info)
 
-    # représente un niveau de 0 à 100 sous forme de carré de taille 5*5
-    # chaque colonne du carré représente une portion de 20% du niveau
-    # chaque point d'une colonne représente une portion de 4%
-    #------------------------------------------------------------------------
-    def draw_square_level(self, level, x,y):
-        nb_c = int(level/20)        #nb de tranches de 20% atteintes, varie de 0 à 5
-        nb_l = int((level%20)/4)    #reste représantant 4% chacun: varie de 0 à 5
-        self.draw_fullbox(10, 6, 14, 10 ,self.c_gris_fonce) #fond niveau DISK
-        h = self.hue_level(level)
-        #tranches pleines de 20%
-        for c in range(nb_c):
-            for l in range(5):
-                unicornhathd.set_pixel_hsv(c+x,l+y, h, 1.0, (c+1)/nb_c) #dégradé gauche(-) vers droite (+)
-                #unicornhathd.set_pixel_hsv(c+x,l+y, h, 1.0, 1-c/(nb_c+1))    #dégradé gauche(+) vers droite (-)
-                
-        #tranches de 4% supplémentaires
-        for l in range(nb_l):
-            unicornhathd.set_pixel_hsv(nb_c+x,l+y,h)  #dégradé gauche(-) vers droite (+)
-            #unicornhathd.set_pixel_hsv(nb_c+x,l+y,h, 1.0,1-nb_c/(nb_c+1)  )   #dégradé gauche(+) vers droite (-)
-            
-
-    # affiche T° CPU t 
-    #-----------------------------------------------------
-    def draw_T(self, t, h):
-        matrix_bin = self.msg.create_msg(str(t)) #conversion du message en codes binaires
-        for i in range(13): #T° exprimées sous forme de 13 codes binaires
-            xb=0b10000
-            n5b=matrix_bin[i] #1 code binaire sur 5b rerpésente une barre verticale de 5 pixels
-            for l in range(5):
-                if (xb & n5b) == xb :
-                    unicornhathd.set_pixel_hsv(3+i,4-l, h, 1.0, 1.0)
-                else:
-                    unicornhathd.set_pixel(3+i,4-l,0,0,0) #led noire éteinte
-                xb>>=1 #décalage 1b vers la droite
-                
-    
+    # True tant que la transition en cours n'est pas terminée
+    #--------------------------------------------------------
+    def moving(self):
+        return self.transition.moving()
+
+    # affiche l'image suivante de la transition (retourne True si show() a été appelé)
+    #---------------------------------------------------------------------------------
+    def draw_frame(self):
+        advance = self.transition.first     # première image d'un relevé: décale les graphes défilants
+        return self.draw_info(self.transition.next(), advance)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_async.py
+# Description : variante asyncio de sysdroid_main: lecture, affichage et animations
+#               dans une seule boucle d'évènements (pas de threads d'affichage/lecture)
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import asyncio, signal, time
+import concurrent.futures
+from sysdroid_UHHD import SysDroid_uhhd
+from sysdroid_main import ReadSys
+from sysdroid_stats import Stats, StatsServer
+
+
+#classe affichage infos système (via coroutines)
+#-----------------------------------------------------------------------------------------
+class AsyncSysDroid():
+    def __init__(self, verbose, delay, rotation, workers=1, graph=None, display=None, delay_max=None, thresholds=None, layout=None, fps=0):
+        self.verbose = verbose      # True: active les print
+        self.delay = delay          # délais en secondes de rafraichissement des infos systèmes
+        self.rotation = rotation    # angle d'affichage sur la matrice UHHD (mutliple de 90°)
+        self.workers = workers      # nb max de lectures bloquantes (psutil, sysfs) exécutées en parallèle
+        self.info = None            # dernier relevé (SysInfo)
+        print ('Sysdroid démarre ... ')
+        self.stats = Stats()        # mesures du coût de sysdroid
+        self.readsys = ReadSys(verbose, delay, stats=self.stats, delay_max=delay_max, thresholds=thresholds)  # lecture des informations système (le thread n'est pas démarré)
+        self.uhhd = SysDroid_uhhd(rotation, animation=False, nb_cpus=self.readsys.nb_cpus, graph=graph, display=display, layout=layout, fps=fps, history=self.readsys.history, stats=self.stats)   # matrice de leds UHHD, animation jouée par la boucle
+
+    #animation: joue les images d'un générateur de SysDroid_uhhd sans bloquer la boucle
+    #-----------------------------------------------------------------------------------
+    async def animate(self, frames):
+        for _ in frames:
+            await asyncio.sleep(self.uhhd.frame_delay)
+
+    #lecture périodique des informations système dans l'executor
+    #------------------------------------------------------------
+    async def sample(self, executor):
+        loop = asyncio.get_running_loop()
+        if self.verbose:
+            print('Lecture info système démarrée')
+        while True:
+            info = await loop.run_in_executor(executor, self.readsys.read_info)
+            if self.info_new.is_set():
+                self.stats.dropped()    # relevé précédent jamais affiché
+            self.info = info
+            self.info_new.set()
+            if self.verbose:
+                self.readsys.print_info(info)
+            t_next = loop.time() + self.readsys.next_delay(info)
+            while loop.time() < t_next:
+                if self.readsys.adaptive is None:
+                    await asyncio.sleep(t_next - loop.time())
+                else:   #attente par pas de delay (min), interrompue si la sonde détecte une variation
+                    await asyncio.sleep(min(t_next - loop.time(), self.delay))
+                    if await loop.run_in_executor(executor, self.readsys.probe_changed):
+                        break
+
+    #affichage de chaque nouveau relevé
+    #----------------------------------
+    async def render(self):
+        #animation de démarrage, interrompue dès le premier relevé
+        for _ in self.uhhd.frames_start():
+            try:
+                await asyncio.wait_for(self.info_new.wait(), self.uhhd.frame_delay)
+                break
+            except asyncio.TimeoutError:
+                pass
+        self.uhhd.draw_background()
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.info_new.wait()      # valeurs stables: attente d'un nouveau relevé, aucune image
+            self.info_new.clear()
+            self.uhhd.set_info(self.info)   # transition vers le nouveau relevé
+            t_next = loop.time()
+            while self.uhhd.moving():       # une image par période tant que la transition continue
+                t0 = time.perf_counter()
+                self.stats.rendered(t0, self.uhhd.draw_frame())
+                t_next += self.uhhd.frame_period
+                while t_next > loop.time():     # attente de l'image suivante, un nouveau relevé relance la transition
+                    try:
+                        await asyncio.wait_for(self.info_new.wait(), t_next - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                    self.info_new.clear()
+                    self.uhhd.set_info(self.info)
+
+    #exécution jusqu'à annulation (CTRL-C ou SIGTERM), puis extinction de la matrice
+    #--------------------------------------------------------------------------------
+    async def run(self):
+        self.info_new = asyncio.Event()     # signale un nouveau relevé
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, task.cancel)    # arrêt par systemd
+        except (NotImplementedError, RuntimeError):
+            pass
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            await asyncio.gather(self.sample(executor), self.render())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            executor.shutdown(wait=False)
+            try:
+                await self.animate(self.uhhd.frames_quit())
+            finally:
+                self.uhhd.off()
+                print('Sysdroid arrêté')
+
+
+#classe application principale
+#------------------------------------------------------------------------------
+class AsyncApplication():
+    def __init__(self, verbose=False, delay=30, rotation=0, workers=1, graph=None, display=None, stats_endpoint=None, delay_max=None, thresholds=None, layout=None, fps=25):
+        #delay_max: délais adaptatif entre delay (mesures qui varient) et delay_max (mesures stables), délais fixe si None
+        #thresholds: variations déclenchant le retour à delay (défaut: AdaptiveDelay.THRESHOLDS)
+        #graph: None (tableau de bord) ou mesure affichée en graphe défilant ('cpu_util', 'mem_used', 'cpu_t_level', 'disk_used')
+        #layout: disposition des widgets (sysdroid_layout): liste, nom ('dashboard', 'temperature', 'io') ou fichier JSON
+        #fps: images par seconde max des transitions adoucies entre 2 relevés (0: affichage direct)
+        #display: afficheur (sysdroid_display), Unicorn HAT HD si None
+        #stats_endpoint: None, chemin d'une socket Unix ou port HTTP local publiant les statistiques de sysdroid
+        self.sysdroid = AsyncSysDroid(verbose, delay, rotation, workers, graph, display, delay_max, thresholds, layout, fps)
+        self.stats_server = None
+        if stats_endpoint is not None:
+            self.stats_server = StatsServer(self.sysdroid.stats, stats_endpoint)
+
+    def loop(self):
+        if self.stats_server is not None:
+            self.stats_server.start()
+        try:
+            asyncio.run(self.sysdroid.run())
+        except KeyboardInterrupt:  # CTRL-C: la boucle a déjà annulé et arrêté les coroutines
+            pass
+        finally:
+            if self.stats_server is not None:
+                self.stats_server.stop()
+
+
+if __name__ == '__main__':     # Program start from here
+    appl=AsyncApplication(verbose=False, delay=1, delay_max=30, rotation=90)
+    appl.loop()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_bench.py
+# Description : mesures de performance de sysdroid sur une matrice UHHD simulée (SimDisplay)
+#               (exécutable sans Raspberry Pi ni Unicorn HAT HD)
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import os, sys, time, random, asyncio, statistics
+import sysdroid_main, sysdroid_async
+from sysdroid_UHHD import SysDroid_uhhd, Msg
+from sysdroid_display import SimDisplay
+from sysdroid_layout import LAYOUTS
+
+#pas de capteur de T° hors Raspberry Pi: valeur fixe
+if not os.path.exists('/sys/class/thermal/thermal_zone0/temp'):
+    sysdroid_main.ReadSys.get_cpu_temp = lambda self: 45.0
+
+
+#enregistre l'heure d'affichage du premier relevé
+#------------------------------------------------
+class FirstFrame():
+    def __init__(self):
+        self.t = None
+        self.draw_info = SysDroid_uhhd.draw_info
+
+    def __enter__(self):
+        first = self
+        def draw_info(uhhd, info, *args):
+            result = first.draw_info(uhhd, info, *args)
+            if first.t is None:
+                first.t = time.perf_counter()
+            return result
+        SysDroid_uhhd.draw_info = draw_info
+        return self
+
+    def __exit__(self, *exc):
+        SysDroid_uhhd.draw_info = self.draw_info
+
+
+#démarrage avec animation bloquante puis lecture (enchaînement avant les animations non bloquantes)
+#--------------------------------------------------------------------------------------------------
+def startup_blocking():
+    t0 = time.perf_counter()
+    readsys = sysdroid_main.ReadSys(False, 30)
+    uhhd = SysDroid_uhhd(0, nb_cpus=readsys.nb_cpus, display=SimDisplay())
+    uhhd.draw_info(readsys.read_info())
+    t = time.perf_counter() - t0
+    uhhd.off()
+    return t
+
+#démarrage de l'application à threads: délais jusqu'à l'affichage du premier relevé
+#----------------------------------------------------------------------------------
+def startup_thread():
+    with FirstFrame() as first:
+        t0 = time.perf_counter()
+        appl = sysdroid_main.Application(verbose=False, delay=30, rotation=0, display=SimDisplay())
+        while first.t is None:
+            time.sleep(0.001)
+        appl.destroy()
+        appl.sysdroid.join()
+        appl.sysdroid.readsys.join()
+    return first.t - t0
+
+#démarrage de l'application asyncio: délais jusqu'à l'affichage du premier relevé
+#--------------------------------------------------------------------------------
+def startup_async():
+    async def main(first):
+        appl = sysdroid_async.AsyncApplication(verbose=False, delay=30, rotation=0, display=SimDisplay())
+        task = asyncio.ensure_future(appl.sysdroid.run())
+        while first.t is None:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        await task
+    with FirstFrame() as first:
+        t0 = time.perf_counter()
+        asyncio.run(main(first))
+    return first.t - t0
+
+#temps de démarrage (time-to-first-frame) de chaque mode
+#--------------------------------------------------------
+def bench_startup(runs=5):
+    print('time-to-first-frame (ms), %d essais' % runs)
+    for name, func in (('bloquant', startup_blocking), ('threads', startup_thread), ('asyncio', startup_async)):
+        times = [func()*1000 for _ in range(runs)]
+        print('  %-10s médiane %7.1f   min %7.1f   max %7.1f' % (name, statistics.median(times), min(times), max(times)))
+
+
+#mesure de n appels à func(i): temps écoulé et temps CPU (thread) de chaque appel en µs
+#-------------------------------------------------------------------------------------
+def measure(func, n):
+    wall = []
+    cpu = []
+    for i in range(n):
+        t0 = time.perf_counter_ns()
+        c0 = time.thread_time_ns()
+        func(i)
+        cpu.append((time.thread_time_ns() - c0)/1000)
+        wall.append((time.perf_counter_ns() - t0)/1000)
+    return wall, cpu
+
+#percentile p (0 à 100) d'une liste de mesures
+#---------------------------------------------
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values)-1, int(round(p/100*(len(values)-1))))]
+
+#affiche une ligne de résultats: temps (p50/p90/p99, CPU moyen) en µs, pixels écrits et show() par appel
+#-------------------------------------------------------------------------------------------------------
+def report(name, n, wall, cpu, display=None):
+    line = '  %-22s p50 %8.1f  p90 %8.1f  p99 %8.1f  cpu %8.1f' % (name, percentile(wall, 50), percentile(wall, 90), percentile(wall, 99), statistics.mean(cpu))
+    if display is not None:
+        line += '  pixels %6.1f  show %5.2f' % (display.nb_pixels/n, display.nb_show/n)
+    print(line)
+
+#relevés simulés reproductibles: marche aléatoire autour de valeurs typiques
+#---------------------------------------------------------------------------
+def readings(n, nb_cpus=4, seed=1):
+    rnd = random.Random(seed)
+    rnd_io = random.Random(-seed)   # tirages séparés: mêmes CPU, mémoire, T° qu'avant l'ajout des E/S
+    cpus = [20.0]*nb_cpus
+    mem, disk, t = 40.0, 55.0, 50.0
+    disks, net = [10.0, 10.0], 5.0
+    infos = []
+    for _ in range(n):
+        cpus = [min(100.0, max(0.0, c + rnd.uniform(-15, 15))) for c in cpus]
+        mem = min(100.0, max(0.0, mem + rnd.uniform(-2, 2)))
+        t = round(min(85.0, max(35.0, t + rnd.uniform(-1, 1))), 1)
+        disks = [min(100.0, max(0.0, d + rnd_io.uniform(-10, 10))) for d in disks]
+        net = min(100.0, max(0.0, net + rnd_io.uniform(-5, 5)))
+        disks_io = tuple(round(d, 1) for d in disks)
+        infos.append(sysdroid_main.SysInfo(t, (t-40)/40*100, round(statistics.mean(cpus), 1), tuple(round(c, 1) for c in cpus), round(mem, 1), disk,
+                                           disks_io, max(disks_io), round(net, 1)))
+    return infos
+
+#textes et widgets de chaque disposition (dessin dans l'image hors écran, sans show)
+#-----------------------------------------------------------------------------------
+def bench_draw(n=2000):
+    print('primitives de dessin (µs par appel), %d appels' % n)
+    msg = Msg()
+    texts = ['%.1f°' % (40 + i % 50 / 10) for i in range(n)]
+    for name, func in (('Msg.create_msg', lambda i: msg.create_msg(texts[i])),
+                       ('Msg.render (cache)', lambda i: msg.render(texts[i], 13))):
+        report(name, n, *measure(func, n))
+    infos = readings(n)
+    for layout in LAYOUTS:
+        uhhd = SysDroid_uhhd(0, animation=False, display=SimDisplay(), layout=layout)
+        cases = [('%s %s' % (type(w).__name__, w.metric), lambda i, w=w: w.draw(infos[i])) for w in uhhd.layout.widgets]
+        cases.append(('layout.draw ' + layout, lambda i: uhhd.layout.draw(infos[i])))
+        for name, func in cases:
+            report(name, n, *measure(func, n))
+
+#rafraichissement complet de l'affichage d'un relevé (SysDroid.run: images de la transition + show)
+#-------------------------------------------------------------------------------------
+def bench_refresh(n=2000):
+    print('rafraichissement complet (µs par relevé), %d relevés' % n)
+    for name, graph, layout, fps in (('tableau de bord', None, None, 0), ('graphe cpu_util', 'cpu_util', None, 0),
+                                     ('T° seule', None, 'temperature', 0), ('entrées/sorties', None, 'io', 0),
+                                     ('transitions 25/s', None, None, 25)):
+        display = SimDisplay()
+        uhhd = SysDroid_uhhd(0, animation=False, display=display, graph=graph, layout=layout, fps=fps)
+        uhhd.draw_background()
+        for label, infos in (('', readings(n)), (' (fixe)', readings(1)*n)):   #relevés variables puis identiques
+            display.reset_counters()
+            wall, cpu = measure(lambda i: transition(uhhd, infos[i]), n)
+            report(name + label, n, wall, cpu, display)
+
+#affichage d'un relevé par SysDroid.run: toutes les images de la transition (une seule si fps=0)
+#-----------------------------------------------------------------------------------------------
+def transition(uhhd, info):
+    uhhd.set_info(info)
+    while uhhd.moving():
+        uhhd.draw_frame()
+
+#cycle de lecture des informations système (ReadSys.read_info)
+#-------------------------------------------------------------
+def bench_collect(n=500):
+    print('lecture des informations système (µs par relevé), %d relevés' % n)
+    readsys = sysdroid_main.ReadSys(False, 30)
+    report('ReadSys.read_info', n, *measure(lambda i: readsys.read_info(), n))
+
+
+if __name__ == '__main__':     # Program start from here
+    #usage: sysdroid_bench.py [startup] [draw] [refresh] [collect] (tous par défaut)
+    benchs = {'startup': bench_startup, 'draw': bench_draw, 'refresh': bench_refresh, 'collect': bench_collect}
+    for name in sys.argv[1:] or list(benchs):
+        benchs[name]()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_collect.py
+# Description : lecture économique des informations système (Linux)
+#               fichiers /proc et /sys gardés ouverts et relus par pread
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import os, time, array
+import numpy
+import psutil
+
+
+#fichier virtuel (/proc, /sys) ouvert une seule fois et relu depuis le début par pread
+#-----------------------------------------------------------------------------------------
+class SysFile():
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size            # nb max d'octets relus
+        self.fd = os.open(path, os.O_RDONLY)
+
+    #relecture du contenu (bytes)
+    #----------------------------
+    def read(self):
+        return os.pread(self.fd, self.size, 0)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+#utilisation des CPUs calculée à partir d'une seule lecture de /proc/stat par relevé
+#l'utilisation globale est calculée à partir des mêmes compteurs que celle de chaque CPU
+#relevés et sondes partagent les mêmes compteurs de référence: un relevé déclenché par la sonde
+#couvre la dernière période de sonde, pas tout l'intervalle depuis le relevé précédent
+#-----------------------------------------------------------------------------------------
+class CpuTimes():
+    def __init__(self, path='/proc/stat'):
+        nb_cpus = psutil.cpu_count() or 1
+        self.stat = SysFile(path, max(4096, 128*(nb_cpus+2)))
+        self.last = self.read_times()   # compteurs du relevé ou de la sonde précédente
+        self.nb_cpus = len(self.last)   # nb de coeurs CPU
+
+    #compteurs (total, occupé) de chaque CPU en ticks
+    #même calcul que psutil: total sans guest/guest_nice (déjà comptés dans user/nice), occupé = total - idle - iowait
+    #------------------------------------------------------------------------------------------------------------------
+    def read_times(self):
+        times = []
+        for line in self.stat.read().split(b'\n')[1:]:
+            if not line.startswith(b'cpu'):
+                break
+            fields = [int(v) for v in line.split()[1:]]
+            total = sum(fields[:8])
+            times.append((total, total - fields[3] - fields[4]))
+        return times
+
+    #compteurs globaux (total, occupé): somme des compteurs de chaque CPU
+    #--------------------------------------------------------------------
+    def total(self, times):
+        return sum(t[0] for t in times), sum(t[1] for t in times)
+
+    #utilisation (%) depuis le relevé ou la sonde précédente: (globale, tuple de chaque CPU)
+    #--------------------------------------------------------------------------------------
+    def sample(self):
+        times = self.read_times()
+        cpus = []
+        all_total = all_busy = 0
+        for (total, busy), (last_total, last_busy) in zip(times, self.last):
+            d_total = total - last_total
+            d_busy = busy - last_busy
+            all_total += d_total
+            all_busy += d_busy
+            cpus.append(round(100*d_busy/d_total, 1) if d_total > 0 else 0.0)
+        self.last = times
+        cpu = round(100*all_busy/all_total, 1) if all_total > 0 else 0.0
+        return cpu, tuple(cpus)
+
+    #sonde légère: utilisation globale (%) depuis la sonde ou le relevé précédent
+    #les compteurs de chaque CPU deviennent la référence du relevé suivant
+    #-----------------------------------------------------------------------------
+    def probe(self):
+        times = self.read_times()
+        total, busy = self.total(times)
+        last_total, last_busy = self.total(self.last)
+        self.last = times
+        return round(100*(busy-last_busy)/(total-last_total), 1) if total > last_total else 0.0
+
+
+#mémoire physique utilisée (%) lue dans /proc/meminfo: (MemTotal - MemAvailable) / MemTotal
+#--------------------------------------------------------------------------------------------
+class MemInfo():
+    def __init__(self):
+        self.meminfo = SysFile('/proc/meminfo')
+
+    def used(self):
+        total = avail = None
+        for line in self.meminfo.read().split(b'\n'):
+            if line.startswith(b'MemTotal:'):
+                total = int(line.split()[1])
+            elif line.startswith(b'MemAvailable:'):
+                avail = int(line.split()[1])
+                break
+        if not total or avail is None:
+            return psutil.virtual_memory()[2]   # noyau sans MemAvailable
+        return round(100*(total-avail)/total, 1)
+
+
+#usage disque (%) d'un point de montage, relu au plus toutes les 'delay' secondes
+#---------------------------------------------------------------------------------
+class DiskUsage():
+    def __init__(self, path='/', delay=300):
+        self.path = path
+        self.delay = delay          # délais en secondes entre 2 lectures réelles
+        self.value = None           # dernier usage lu (%)
+        self.t_read = None          # heure de la dernière lecture (time.monotonic)
+
+    def used(self):
+        now = time.monotonic()
+        if self.t_read is None or now - self.t_read >= self.delay:
+            self.value = psutil.disk_usage(self.path)[3]
+            self.t_read = now
+        return self.value
+
+
+#différences entre 2 relevés de compteurs cumulés (tableaux numpy int64)
+#compteur revenu en arrière: dépassement d'un compteur 32 bits si l'ancienne valeur était dans la moitié haute
+#de la plage 32 bits et la nouvelle dans la moitié basse, sinon remise à zéro (disque rebranché, pilote rechargé,
+#interface recréée, noyau 64 bits): delta = nouvelle valeur, comme psutil (nowrap)
+#-----------------------------------------------------------------------------------------------------------
+def counter_deltas(values, last):
+    deltas = values - last
+    back = deltas < 0
+    if back.any():
+        wrap = (last[back] >= 1 << 31) & (last[back] < 1 << 32) & (values[back] < 1 << 31)
+        deltas[back] = numpy.where(wrap, values[back] + (1 << 32) - last[back], values[back])
+    return deltas
+
+
+#occupation et débits des disques de chaque point de montage: une seule lecture de /proc/diskstats par relevé
+#(mêmes compteurs que psutil.disk_io_counters(perdisk=True)), points de montage recherchés une seule fois
+#  mounts: points de montage suivis (ceux des partitions physiques de psutil.disk_partitions() si None)
+#-----------------------------------------------------------------------------------------
+class DiskIO():
+    def __init__(self, mounts=None):
+        if mounts is None:
+            mounts = [part.mountpoint for part in psutil.disk_partitions()]
+        self.mounts = []            # points de montage suivis
+        self.disks = []             # partition (nom dans /proc/diskstats) de chaque point de montage
+        for mount in mounts:
+            disk = self.block_device(mount)
+            if disk is not None and disk not in self.disks:
+                self.mounts.append(mount)
+                self.disks.append(disk)
+        self.rows = {disk.encode(): i for i, disk in enumerate(self.disks)}  # ligne des compteurs de chaque disque
+        self.diskstats = SysFile('/proc/diskstats', 65536)
+        self.values = numpy.zeros((len(self.disks), 3), dtype=numpy.int64)  # compteurs lus
+        self.last = self.read_counters().copy()     # compteurs du relevé précédent
+        self.t_last = time.monotonic()
+        self.rates = numpy.zeros(len(self.disks))   # débit lecture + écriture de chaque disque (octets/s)
+
+    #nom du périphérique bloc d'un point de montage ('/dev/root' du Raspberry Pi -> 'mmcblk0p2')
+    #-------------------------------------------------------------------------------------------
+    def block_device(self, mount):
+        try:
+            dev = os.stat(mount).st_dev
+        except OSError:
+            return None
+        path = '/sys/dev/block/%d:%d' % (os.major(dev), os.minor(dev))
+        return os.path.basename(os.path.realpath(path)) if os.path.exists(path) else None
+
+    #compteurs (secteurs lus, secteurs écrits, temps d'occupation en ms) de chaque disque
+    #-------------------------------------------------------------------------------------
+    def read_counters(self):
+        for line in self.diskstats.read().split(b'\n'):
+            fields = line.split()
+            if len(fields) > 12 and fields[2] in self.rows:
+                self.values[self.rows[fields[2]]] = int(fields[5]), int(fields[9]), int(fields[12])
+        return self.values
+
+    #occupation (%) de chaque disque depuis le relevé précédent (part du temps avec des E/S en cours)
+    #-----------------------------------------------------------------------------------------------
+    def sample(self):
+        values = self.read_counters()
+        now = time.monotonic()
+        dt = now - self.t_last
+        deltas = counter_deltas(values, self.last)
+        self.last[:] = values
+        self.t_last = now
+        if dt <= 0:
+            return (0.0,)*len(self.disks)
+        self.rates = 512*(deltas[:, 0] + deltas[:, 1]) / dt     # secteurs de 512 octets
+        return tuple(round(min(100.0, v), 1) for v in (deltas[:, 2] / (10*dt)).tolist())
+
+
+#débits réseau: une seule lecture de /proc/net/dev par relevé (mêmes compteurs que psutil.net_io_counters(pernic=True))
+#interfaces actives (hors loopback) et leur vitesse recherchées une seule fois par psutil.net_if_stats()
+#  nics: interfaces suivies (toutes les interfaces actives si None)
+#  net_max: débit maximal (octets/s) des interfaces de vitesse inconnue (wifi...), 100 Mbit/s par défaut
+#-----------------------------------------------------------------------------------------
+class NetIO():
+    def __init__(self, nics=None, net_max=12.5e6):
+        stats = psutil.net_if_stats()
+        if nics is None:
+            nics = [nic for nic, st in stats.items() if st.isup and nic != 'lo']
+        self.nics = list(nics)      # interfaces suivies
+        #débit maximal de chaque interface dans chaque sens (octets/s), vitesse du lien en Mbit/s
+        self.capacity = numpy.array([stats[nic].speed*125000 if nic in stats and stats[nic].speed > 0 else net_max
+                                     for nic in self.nics], dtype=float)
+        self.rows = {nic.encode(): i for i, nic in enumerate(self.nics)}  # ligne des compteurs de chaque interface
+        self.netdev = SysFile('/proc/net/dev', 65536)
+        self.values = numpy.zeros((len(self.nics), 2), dtype=numpy.int64)  # compteurs lus
+        self.last = self.read_counters().copy()     # compteurs du relevé précédent
+        self.t_last = time.monotonic()
+        self.rates = numpy.zeros((len(self.nics), 2))   # débits (reçus, envoyés) de chaque interface (octets/s)
+
+    #compteurs (octets reçus, octets envoyés) de chaque interface
+    #------------------------------------------------------------
+    def read_counters(self):
+        for line in self.netdev.read().split(b'\n')[2:]:
+            name, _, data = line.partition(b':')
+            name = name.strip()
+            if name in self.rows:
+                fields = data.split()
+                self.values[self.rows[name]] = int(fields[0]), int(fields[8])
+        return self.values
+
+    #charge réseau (%): débit du sens le plus chargé de l'interface la plus chargée, par rapport à sa vitesse
+    #--------------------------------------------------------------------------------------------------------
+    def sample(self):
+        values = self.read_counters()
+        now = time.monotonic()
+        dt = now - self.t_last
+        deltas = counter_deltas(values, self.last)
+        self.last[:] = values
+        self.t_last = now
+        if dt <= 0 or not self.nics:
+            return 0.0
+        self.rates = deltas / dt
+        return round(min(100.0, float((self.rates.max(axis=1) / self.capacity).max()*100)), 1)
+
+
+#délais adaptatif entre 2 relevés: doublé à chaque relevé stable jusqu'à delay_max,
+#ramené à delay_min dès qu'une mesure varie d'au moins son seuil ou que la T° approche de t_alert
+#  thresholds: variation minimale de chaque mesure (champs de SysInfo) déclenchant le retour à delay_min
+#  la T° CPU est toujours surveillée (t_alert), qu'elle ait un seuil de variation ou non
+#-----------------------------------------------------------------------------------------
+class AdaptiveDelay():
+    THRESHOLDS = {'cpu_util': 15, 'mem_used': 5, 'cpu_t': 3, 'disk_used': 1, 'disk_io': 20, 'net_io': 20}
+
+    def __init__(self, delay_min=1, delay_max=30, thresholds=None, t_alert=75, backoff=2):
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+        self.thresholds = dict(self.THRESHOLDS if thresholds is None else thresholds)
+        self.t_alert = t_alert      # T° CPU au dessus de laquelle le délais reste à delay_min
+        self.backoff = backoff      # facteur d'augmentation du délais quand les mesures sont stables
+        self.delay = delay_min      # délais courant
+        self.last = None            # mesures du relevé précédent (dict)
+
+    #True si une des mesures (dict nom: valeur) varie d'au moins son seuil par rapport au relevé précédent
+    #-----------------------------------------------------------------------------------------------------
+    def changed(self, values):
+        if self.last is None:
+            return True
+        if values.get('cpu_t', 0) >= self.t_alert:
+            return True
+        for name, value in values.items():
+            if name in self.thresholds and abs(value - self.last[name]) >= self.thresholds[name]:
+                return True
+        return False
+
+    #délais avant le prochain relevé en fonction du relevé info (SysInfo)
+    #--------------------------------------------------------------------
+    def update(self, info):
+        values = {name: getattr(info, name) for name in self.thresholds}
+        values['cpu_t'] = info.cpu_t    # toujours comparée à t_alert, même sans seuil de variation
+        if self.changed(values):
+            self.delay = self.delay_min
+        else:
+            self.delay = min(self.delay_max, self.delay*self.backoff)
+        self.last = values
+        return self.delay
+
+
+#historique de taille fixe d'une mesure (buffer circulaire sur un array de float, aucune allocation par ajout)
+#-------------------------------------------------------------------------------------------------------------
+class RingBuffer():
+    def __init__(self, size=16):
+        self.size = size
+        self.data = array.array('f', bytes(4*size))
+        self.pos = 0                # emplacement du prochain ajout
+        self.count = 0              # nb de valeurs enregistrées (au plus size)
+
+    def append(self, value):
+        self.data[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    #valeurs enregistrées, de la plus ancienne à la plus récente
+    #-----------------------------------------------------------
+    def values(self):
+        pos, count = self.pos, self.count   # lus une seule fois: ajout possible par un autre thread
+        if count < self.size:
+            return self.data[:count]
+        return self.data[pos:] + self.data[:pos]
+
+    #valeur la plus récente (None si vide)
+    #-------------------------------------
+    def last(self):
+        return self.data[self.pos-1] if self.count else None
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_collect_test.py
+# Description : tests de la lecture des informations système sur des fichiers /proc simulés
+#               usage: python -m pytest -q sysdroid_collect_test.py
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import numpy
+from sysdroid_collect import CpuTimes, counter_deltas
+
+
+#/proc/stat simulé: compteurs (occupé, inactif) de chaque CPU en ticks
+#---------------------------------------------------------------------
+class FakeStat():
+    def __init__(self, path, nb_cpus=1):
+        self.path = path
+        self.cpus = [[0, 0] for _ in range(nb_cpus)]
+        self.write()
+
+    #ajoute dt ticks à chaque CPU dont pct % occupés
+    #-----------------------------------------------
+    def run(self, dt, pct):
+        for cpu in self.cpus:
+            cpu[0] += dt*pct//100
+            cpu[1] += dt - dt*pct//100
+        self.write()
+
+    def write(self):
+        busy = sum(c[0] for c in self.cpus)
+        idle = sum(c[1] for c in self.cpus)
+        lines = ['cpu  %d 0 0 %d 0 0 0 0 0 0' % (busy, idle)]
+        lines += ['cpu%d %d 0 0 %d 0 0 0 0 0 0' % (i, c[0], c[1]) for i, c in enumerate(self.cpus)]
+        lines.append('intr 0')
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+def test_probe_triggered_reading_covers_probe_period(tmp_path):
+    #29 s à 2% (une sonde par seconde) puis 1 s à 100%: le relevé déclenché par la sonde montre le pic
+    stat = FakeStat(str(tmp_path / 'stat'))
+    cpu_times = CpuTimes(stat.path)
+    for _ in range(29):
+        stat.run(100, 2)
+        assert cpu_times.probe() == 2.0
+    stat.run(100, 100)
+    assert cpu_times.probe() == 100.0
+    stat.run(1, 100)        # lecture du relevé juste après la sonde
+    assert cpu_times.sample() == (100.0, (100.0,))
+
+
+def test_sample_without_probe(tmp_path):
+    stat = FakeStat(str(tmp_path / 'stat'), nb_cpus=2)
+    cpu_times = CpuTimes(stat.path)
+    stat.run(3000, 10)
+    assert cpu_times.nb_cpus == 2
+    assert cpu_times.sample() == (10.0, (10.0, 10.0))
+
+
+def test_counter_deltas_wrap_and_reset():
+    last = numpy.array([[5_000_000, 10], [(1 << 32) - 100, (1 << 32) - 1]], dtype=numpy.int64)
+    values = numpy.array([[100, 5], [50, 9]], dtype=numpy.int64)
+    #1ère ligne: remise à zéro (delta = nouvelle valeur), 2ème ligne: dépassement d'un compteur 32 bits
+    assert counter_deltas(values, last).tolist() == [[100, 5], [150, 10]]
+    #compteurs 64 bits au delà de 2**32 revenus en arrière: remise à zéro
+    last = numpy.array([[1 << 40]], dtype=numpy.int64)
+    assert counter_deltas(numpy.array([[7]], dtype=numpy.int64), last).tolist() == [[7]]
+    #compteurs croissants: simple différence
+    assert counter_deltas(numpy.array([[30]], dtype=numpy.int64), numpy.array([[10]], dtype=numpy.int64)).tolist() == [[20]]
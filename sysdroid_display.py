@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_display.py
+# Description : afficheurs de la matrice 16x16: Unicorn HAT HD réelle ou simulée en mémoire
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import collections, struct, zlib
+import numpy
+
+
+#interface d'un afficheur 16x16 (x|colonne, y|lignes)  (0,0): en bas à gauche
+#-----------------------------------------------------------------------------------------
+class Display():
+    width = 16
+    height = 16
+
+    def brightness(self, b):        # luminosité de 0.0 à 1.0
+        pass
+
+    def rotation(self, r):          # rotation en degrés (multiple de 90°)
+        pass
+
+    #copie une zone de pixels (tableau largeur x hauteur x 3) en pos (x,y) dans le buffer de l'afficheur
+    #---------------------------------------------------------------------------------------------------
+    def write(self, x, y, pixels):
+        raise NotImplementedError
+
+    def set_pixel(self, x, y, r, g, b):
+        self.write(x, y, numpy.array([[[r, g, b]]]))
+
+    def show(self):                 # envoie le buffer sur la matrice
+        raise NotImplementedError
+
+    def clear(self):                # efface le buffer (sans affichage)
+        raise NotImplementedError
+
+    def off(self):                  # efface le buffer et éteint la matrice
+        self.clear()
+        self.show()
+
+
+#Unicorn HAT HD (module unicornhathd, importé à la création: disponible uniquement sur Raspberry Pi)
+#-----------------------------------------------------------------------------------------
+class UnicornDisplay(Display):
+    def __init__(self):
+        import unicornhathd
+        self.uh = unicornhathd
+
+    def brightness(self, b):
+        self.uh.brightness(b)
+
+    def rotation(self, r):
+        self.uh.rotation(r)
+
+    def write(self, x, y, pixels):
+        self.uh.get_pixels()[x:x+pixels.shape[0], y:y+pixels.shape[1]] = pixels
+
+    def set_pixel(self, x, y, r, g, b):
+        self.uh.set_pixel(x, y, r, g, b)
+
+    def show(self):
+        self.uh.show()
+
+    def clear(self):
+        self.uh.clear()
+
+    def off(self):
+        self.uh.off()
+
+
+#matrice simulée en mémoire: compte les appels, enregistre les images affichées (max_frames dernières)
+#et exporte des instantanés ASCII ou PNG. Sans matériel: mesures de performance, tests de non régression
+#-----------------------------------------------------------------------------------------
+class SimDisplay(Display):
+    def __init__(self, max_frames=0):
+        self.buf = numpy.zeros((self.width, self.height, 3), dtype=numpy.uint8)  # buffer de l'afficheur
+        self.frames = collections.deque(maxlen=max_frames)  # copies des dernières images affichées
+        self.nb_show = 0            # nb d'appels à show()
+        self.nb_set_pixel = 0       # nb d'appels à set_pixel()
+        self.nb_pixels = 0          # nb de pixels écrits (set_pixel et write)
+        self.b = 0.5
+        self.r = 0
+
+    def brightness(self, b):
+        self.b = b
+
+    def rotation(self, r):
+        self.r = r
+
+    def write(self, x, y, pixels):
+        self.buf[x:x+pixels.shape[0], y:y+pixels.shape[1]] = pixels
+        self.nb_pixels += pixels.shape[0]*pixels.shape[1]
+
+    def set_pixel(self, x, y, r, g, b):
+        self.buf[x, y] = r, g, b
+        self.nb_set_pixel += 1
+        self.nb_pixels += 1
+
+    def show(self):
+        self.nb_show += 1
+        if self.frames.maxlen:
+            self.frames.append(self.buf.copy())
+
+    def clear(self):
+        self.buf.fill(0)
+
+    #remet les compteurs à zéro
+    #--------------------------
+    def reset_counters(self):
+        self.nb_show = self.nb_set_pixel = self.nb_pixels = 0
+        self.frames.clear()
+
+    #image (hauteur x largeur x 3) dans le sens de lecture: ligne y=15 en haut
+    #-------------------------------------------------------------------------
+    def image(self, frame=None):
+        frame = self.buf if frame is None else frame
+        return frame.transpose(1, 0, 2)[::-1]
+
+    #instantané ASCII: '.' pixel éteint, '+' pixel sombre, '#' pixel lumineux
+    #-------------------------------------------------------------------------
+    def ascii(self, frame=None):
+        level = self.image(frame).max(axis=2)
+        return '\n'.join(''.join('.' if v == 0 else '+' if v < 128 else '#' for v in row) for row in level)
+
+    #instantané PNG (module zlib uniquement), chaque pixel agrandi en carré de scale x scale
+    #---------------------------------------------------------------------------------------
+    def png(self, path, frame=None, scale=10):
+        img = numpy.repeat(numpy.repeat(self.image(frame), scale, axis=0), scale, axis=1).astype(numpy.uint8)
+        h, w = img.shape[0], img.shape[1]
+        raw = b''.join(b'\x00' + row.tobytes() for row in img)
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)))
+            f.write(chunk(b'IDAT', zlib.compress(raw)))
+            f.write(chunk(b'IEND', b''))
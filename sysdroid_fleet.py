@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_fleet.py
+# Description : supervision d'une flotte de Raspberry Pi sur une seule Unicorn HAT HD
+#               chaque Pi envoie ses relevés (FleetSender) en UDP ou socket Unix (datagrammes)
+#               au Pi équipé de la matrice (FleetApplication): une case par Pi
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import os, time, socket, select, struct
+import numpy
+from sysdroid_main import ReadSys
+from sysdroid_UHHD import SysDroid_uhhd
+
+#format binaire d'un relevé (32 octets, little endian):
+#  magic 'SD', version, réservé, nom du Pi (16 octets), n° de relevé,
+#  T° CPU (dixièmes de °C), CPU global, mémoire utilisée, usage disque (dixièmes de %)
+#-----------------------------------------------------------------------------------------
+FLEET_MAGIC = 0x4453
+FLEET_VERSION = 1
+FLEET_STRUCT = struct.Struct('<HBB16sIhHHH')
+FLEET_DTYPE = numpy.dtype([('magic', '<u2'), ('version', 'u1'), ('flags', 'u1'), ('host', 'S16'), ('seq', '<u4'),
+                           ('cpu_t', '<i2'), ('cpu_util', '<u2'), ('mem_used', '<u2'), ('disk_used', '<u2')])
+FLEET_METRICS = ('cpu_util', 'mem_used', 'cpu_t', 'disk_used')  # mesures affichées dans chaque case
+FLEET_TIMEOUT = 10      # délais (s) sans relevé au delà duquel un Pi est affiché absent (case grise)
+
+
+#socket datagramme: address = (hôte, port) pour UDP, chemin pour une socket Unix
+#---------------------------------------------------------------------------------
+def fleet_socket(address):
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+
+#envoi des relevés d'un Pi: un datagramme de 32 octets par relevé, buffer réutilisé
+#-----------------------------------------------------------------------------------------
+class FleetPublisher():
+    def __init__(self, address, host=None):
+        self.address = address
+        self.host = (host or socket.gethostname()).encode()[:16]
+        self.sock = fleet_socket(address)
+        self.sock.setblocking(False)    # file de l'agrégateur pleine: relevé perdu plutôt qu'attente
+        self.packet = bytearray(FLEET_STRUCT.size)
+        self.seq = 0
+
+    def send(self, info):
+        self.seq = (self.seq + 1) & 0xffffffff
+        FLEET_STRUCT.pack_into(self.packet, 0, FLEET_MAGIC, FLEET_VERSION, 0, self.host, self.seq,
+                               int(round(info.cpu_t*10)), int(round(info.cpu_util*10)),
+                               int(round(info.mem_used*10)), int(round(info.disk_used*10)))
+        try:
+            self.sock.sendto(self.packet, self.address)
+        except OSError:
+            pass                # agrégateur absent ou saturé: le relevé est perdu, le suivant sera envoyé
+
+    def close(self):
+        self.sock.close()
+
+
+#réception des relevés de la flotte
+#les datagrammes sont lus par lots dans un buffer numpy préalloué (recv_into) puis décodés en une fois
+#état de chaque Pi: tableaux de taille fixe max_hosts (aucune allocation par datagramme)
+#-----------------------------------------------------------------------------------------
+class FleetReceiver():
+    def __init__(self, address, max_hosts=64, batch=64):
+        self.address = address
+        self.max_hosts = max_hosts
+        self.sock = fleet_socket(address)
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)      # socket d'une exécution précédente
+        self.sock.bind(address)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 18)  # rafales de relevés entre 2 lectures
+        self.sock.setblocking(False)
+        self.packets = numpy.zeros(batch, dtype=FLEET_DTYPE)  # lot de datagrammes reçus
+        self.views = [memoryview(self.packets[i:i+1]).cast('B') for i in range(batch)]
+        keys = numpy.dtype({'names': ['host'], 'formats': [('<u8', 2)], 'offsets': [4], 'itemsize': FLEET_DTYPE.itemsize})
+        self.keys = self.packets.view(keys)['host']     # nom du Pi vu comme 2 entiers (même mémoire)
+        self.host_keys = numpy.zeros((max_hosts, 2), dtype='<u8')       # noms des Pi connus
+        self.names = []             # noms des Pi dans l'ordre d'arrivée
+        self.values = numpy.zeros((max_hosts, len(FLEET_METRICS)), dtype=numpy.float32)  # dernières mesures
+        self.seen = numpy.zeros(max_hosts)      # heure (time.monotonic) du dernier relevé de chaque Pi
+        self.nb_packets = 0         # nb de datagrammes valides reçus
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    #index d'un Pi (ajouté s'il est inconnu), None si la flotte est complète
+    #-----------------------------------------------------------------------
+    def host_index(self, key, name):
+        n = len(self.names)
+        found = numpy.flatnonzero((self.host_keys[:n] == key).all(axis=1))
+        if len(found):
+            return found[0]
+        if n >= self.max_hosts:
+            return None
+        self.host_keys[n] = key
+        self.names.append(name.decode(errors='replace'))
+        return n
+
+    #lit tous les datagrammes en attente (par lots) et met à jour l'état des Pi, retourne le nb de relevés lus
+    #les datagrammes de la bonne taille occupent les nb premiers emplacements du lot: un datagramme
+    #d'un autre format est lu dans l'emplacement suivant, qui sera réutilisé
+    #--------------------------------------------------------------------------------------------------------
+    def poll(self):
+        total = 0
+        empty = False
+        while not empty:
+            nb = 0
+            for _ in range(len(self.views)):    # au plus un lot de datagrammes lus
+                try:
+                    size = self.sock.recv_into(self.views[nb])
+                except BlockingIOError:
+                    empty = True        # file de réception vide
+                    break
+                if size == FLEET_DTYPE.itemsize:
+                    nb += 1
+            if nb:
+                total += self.decode(nb)
+        return total
+
+    #décodage vectorisé des nb premiers datagrammes du lot
+    #-----------------------------------------------------
+    def decode(self, nb):
+        packets = self.packets[:nb]
+        valid = (packets['magic'] == FLEET_MAGIC) & (packets['version'] == FLEET_VERSION)
+        keys = self.keys[:nb]
+        n = len(self.names)
+        index = numpy.full(nb, -1)
+        if n:
+            match = (keys[:, numpy.newaxis, :] == self.host_keys[numpy.newaxis, :n, :]).all(axis=2)
+            index = numpy.where(match.any(axis=1), match.argmax(axis=1), -1)
+        for i in numpy.flatnonzero(valid & (index < 0)):      # Pi inconnus: rare, traités un par un
+            host = self.host_index(keys[i], packets['host'][i])
+            index[i] = -1 if host is None else host
+        valid &= index >= 0
+        rows = index[valid]
+        for col, name in enumerate(FLEET_METRICS):
+            self.values[rows, col] = packets[name][valid] / 10
+        self.seen[rows] = time.monotonic()
+        self.nb_packets += len(rows)
+        return len(rows)
+
+    def close(self):
+        self.sock.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+#carte de la flotte: une case par Pi, 4 quarts de case: CPU (haut gauche), mémoire (haut droite),
+#T° CPU (bas gauche), disque (bas droite). Pi sans relevé depuis timeout secondes: case grise.
+#les index des pixels de chaque quart sont calculés une seule fois: chaque affichage est un seul scatter numpy
+#-----------------------------------------------------------------------------------------
+class FleetMap():
+    def __init__(self, uhhd, max_hosts=64, t_min=40, t_max=80, timeout=FLEET_TIMEOUT):
+        self.uhhd = uhhd
+        self.t_min = t_min
+        self.t_max = t_max
+        self.timeout = timeout
+        per_row = 1
+        while per_row*per_row < max_hosts:
+            per_row *= 2
+        self.size = max(2, 16 // per_row)       # taille d'une case en pixels
+        per_row = 16 // self.size
+        self.max_hosts = min(max_hosts, per_row*per_row)
+        half = self.size // 2
+        #pixels de chaque quart de case: xs, ys de forme (max_hosts, 4, half*half)
+        dx, dy = numpy.meshgrid(numpy.arange(half), numpy.arange(half), indexing='ij')
+        quarters = [(0, half), (half, half), (0, 0), (half, 0)]     # ordre de FLEET_METRICS
+        hosts = numpy.arange(self.max_hosts)
+        x0 = (hosts % per_row)*self.size
+        y0 = 15 - (hosts // per_row)*self.size - (self.size-1)      # premier Pi en haut à gauche
+        self.xs = numpy.stack([x0[:, None] + qx + dx.ravel() for qx, qy in quarters], axis=1)
+        self.ys = numpy.stack([y0[:, None] + qy + dy.ravel() for qx, qy in quarters], axis=1)
+
+    #dessine les cases des nb_hosts premiers Pi à partir des mesures values (max_hosts x 4)
+    #----------------------------------------------------------------------------------------
+    def draw(self, values, seen, nb_hosts):
+        n = min(nb_hosts, self.max_hosts)
+        levels = values[:n].astype(float)
+        levels[:, 2] = (levels[:, 2] - self.t_min)/(self.t_max - self.t_min)*100   # T° en %
+        rgb = self.uhhd.colors.rgb[self.uhhd.colors.levels(levels), self.uhhd.colors.V_STEPS]  # (n, 4, 3)
+        stale = time.monotonic() - seen[:n] > self.timeout
+        rgb[stale] = self.uhhd.c_gris_fonce
+        self.uhhd.fb.buf[self.xs[:n], self.ys[:n]] = rgb[:, :, numpy.newaxis, :]
+
+
+#envoi des relevés d'un Pi (sans matrice) vers l'agrégateur
+#les relevés sont lus par le thread ReadSys (délais adaptatif entre delay et delay_max, sonde entre 2 relevés):
+#chaque relevé est envoyé dès sa lecture. Mesures stables: le dernier relevé est renvoyé toutes les heartbeat
+#secondes (moins que le timeout de l'agrégateur) pour que le Pi ne soit pas affiché absent
+#-----------------------------------------------------------------------------------------
+class FleetSender():
+    def __init__(self, address, delay=1, host=None, verbose=False, delay_max=None, heartbeat=FLEET_TIMEOUT/2):
+        self.heartbeat = heartbeat
+        self.readsys = ReadSys(verbose, delay, delay_max=delay_max)  # lecture des informations système
+        self.publisher = FleetPublisher(address, host)
+        self.readsys.start()        # démarrage du thread de lecture des info systèmes
+
+    def loop(self):
+        while not self.readsys.arret:
+            info = self.readsys.get_info(self.heartbeat)    # attente d'un nouveau relevé
+            if info is None:
+                info = self.readsys.info    # aucun nouveau relevé: dernier relevé renvoyé
+            if info is not None:
+                self.publisher.send(info)
+
+    def destroy(self):
+        self.readsys.stop()
+        self.publisher.close()
+
+
+#classe application agrégateur: carte de la flotte sur la matrice UHHD
+#-----------------------------------------------------------------------------------------
+class FleetApplication():
+    def __init__(self, address, rotation=0, max_hosts=64, refresh=1, timeout=FLEET_TIMEOUT, verbose=False, display=None):
+        self.verbose = verbose
+        self.refresh = refresh      # délais en secondes entre 2 affichages de la carte
+        self.receiver = FleetReceiver(address, max_hosts)
+        self.uhhd = SysDroid_uhhd(rotation, animation=False, display=display, layout=[])  # aucun widget: matrice réservée à la carte
+        self.uhhd.animation_start()
+        self.uhhd.fb.clear()        # la carte est dessinée sur une image vide au premier affichage
+        self.map = FleetMap(self.uhhd, max_hosts, timeout=timeout)
+
+    def loop(self):
+        t_next = time.monotonic()
+        while True:
+            select.select([self.receiver], [], [], max(0, t_next - time.monotonic()))
+            self.receiver.poll()
+            if time.monotonic() >= t_next:
+                self.map.draw(self.receiver.values, self.receiver.seen, len(self.receiver.names))
+                self.uhhd.show()
+                if self.verbose:
+                    print('Pi:', len(self.receiver.names), 'relevés:', self.receiver.nb_packets)
+                t_next = time.monotonic() + self.refresh
+
+    def destroy(self):          # fonction exécutée sur appui CTRL-C
+        self.receiver.close()
+        self.uhhd.stop()
+
+
+if __name__ == '__main__':     # Program start from here
+    #usage: sysdroid_fleet.py send <hôte agrégateur> [port] | sysdroid_fleet.py [port]
+    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == 'send':
+        appl = FleetSender((sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 8766), delay=1, delay_max=30)
+    else:
+        appl = FleetApplication(('0.0.0.0', int(sys.argv[1]) if len(sys.argv) > 1 else 8766), rotation=90)
+    try:
+        appl.loop()
+    except KeyboardInterrupt:  # When 'Ctrl+C' is pressed, the child program destroy() will be  executed.
+        appl.destroy()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_fleet_test.py
+# Description : tests de l'agrégateur de flotte avec des Pi simulés en local (UDP et socket Unix)
+#               usage: python -m pytest -q sysdroid_fleet_test.py
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import os, time, select, socket
+import numpy
+from sysdroid_main import SysInfo
+from sysdroid_UHHD import SysDroid_uhhd
+from sysdroid_display import SimDisplay
+from sysdroid_fleet import FleetPublisher, FleetReceiver, FleetMap, fleet_socket
+
+
+def reading(cpu_t, cpu_util, mem_used, disk_used):
+    return SysInfo(cpu_t, (cpu_t-40)/40*100, cpu_util, (cpu_util,), mem_used, disk_used, (), 0.0, 0.0)
+
+#lit les datagrammes reçus jusqu'à nb relevés (2 secondes max)
+#-------------------------------------------------------------
+def receive(receiver, nb):
+    total = 0
+    t_end = time.monotonic() + 2
+    while total < nb and time.monotonic() < t_end:
+        select.select([receiver], [], [], 0.1)
+        total += receiver.poll()
+    return total
+
+#2 Pi simulés précédés d'un datagramme d'un autre format: les 2 relevés sont lus
+#-------------------------------------------------------------------------------
+def check_loopback(receiver, address):
+    stray = fleet_socket(address)
+    stray.sendto(b'stray', address)
+    pi_a = FleetPublisher(address, 'piA')
+    pi_b = FleetPublisher(address, 'piB')
+    pi_a.send(reading(45.5, 12.3, 40.0, 55.0))
+    pi_b.send(reading(70.0, 90.0, 80.5, 20.0))
+    assert receive(receiver, 2) == 2
+    assert receiver.names == ['piA', 'piB']
+    assert numpy.allclose(receiver.values[:2], [[12.3, 40.0, 45.5, 55.0], [90.0, 80.5, 70.0, 20.0]], atol=0.01)
+    for sock in (stray, pi_a, pi_b):
+        sock.close()
+
+
+def test_udp_loopback():
+    receiver = FleetReceiver(('127.0.0.1', 0))
+    try:
+        check_loopback(receiver, receiver.sock.getsockname())
+    finally:
+        receiver.close()
+
+
+def test_unix_loopback(tmp_path):
+    address = str(tmp_path / 'fleet.sock')
+    receiver = FleetReceiver(address)
+    try:
+        check_loopback(receiver, address)
+    finally:
+        receiver.close()
+    assert not os.path.exists(address)
+
+
+def test_batch_larger_than_buffer():
+    #plus de relevés en attente que d'emplacements dans un lot: lus en plusieurs lots
+    receiver = FleetReceiver(('127.0.0.1', 0), batch=4)
+    address = receiver.sock.getsockname()
+    stray = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    publishers = [FleetPublisher(address, 'pi%d' % i) for i in range(10)]
+    try:
+        for i, pub in enumerate(publishers):
+            pub.send(reading(50.0, i, 0.0, 0.0))
+            stray.sendto(b'x'*5, address)
+        assert receive(receiver, 10) == 10
+        assert receiver.names == ['pi%d' % i for i in range(10)]
+        assert numpy.allclose(receiver.values[:10, 0], numpy.arange(10))
+    finally:
+        for pub in publishers:
+            pub.close()
+        stray.close()
+        receiver.close()
+
+
+def test_map_silent_host_grey():
+    uhhd = SysDroid_uhhd(0, animation=False, display=SimDisplay(), layout=[])
+    fleet = FleetMap(uhhd, max_hosts=4, timeout=10)
+    values = numpy.full((4, 4), 50.0, dtype=numpy.float32)
+    seen = numpy.full(4, time.monotonic())
+    seen[1] -= 60       # 2ème Pi sans relevé depuis 1 minute
+    fleet.draw(values, seen, 2)
+    buf = uhhd.fb.buf
+    assert (buf[fleet.xs[1], fleet.ys[1]] == uhhd.c_gris_fonce).all()
+    assert not (buf[fleet.xs[0], fleet.ys[0]] == uhhd.c_gris_fonce).all()
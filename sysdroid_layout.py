@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_layout.py
+# Description : disposition déclarative de l'affichage: liste de widgets (dict ou fichier JSON)
+#               associant une mesure (champ de SysInfo) à un type de widget et à une zone de la matrice
+#               compilée au démarrage en index de pixels: chaque affichage est un seul scatter numpy
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import json
+import numpy
+
+#widgets: {'type': type de widget (clé de WIDGETS), 'metric': mesure affichée, 'x': , 'y': (coin bas gauche), options}
+#  bar:       jauge verticale, dégradé de luminosité vers le haut (options: height, width)
+#  bars:      une jauge verticale par valeur d'un tuple (coeurs CPU, disques), regroupées si besoin sur width colonnes
+#             (options: width, height)
+#  square:    jauge carrée, une colonne par tranche de 100/size % (options: size)
+#  title:     lettre de 3x4 pixels (rows: 4 codes binaires 3 bits, ligne du haut en premier) couleur du niveau
+#  text:      valeur de la mesure en chiffres 5x3 (options: width, level: mesure donnant la couleur, format)
+#  sparkline: graphe défilant, une colonne par relevé, la plus récente à droite (options: width, height)
+#-----------------------------------------------------------------------------------------
+DASHBOARD = [
+    {'type': 'title', 'metric': 'cpu_util', 'x': 1, 'y': 12, 'rows': [0b110, 0b101, 0b110, 0b100]},    # P
+    {'type': 'title', 'metric': 'mem_used', 'x': 6, 'y': 12, 'rows': [0b110, 0b101, 0b110, 0b101]},    # R
+    {'type': 'title', 'metric': 'disk_used', 'x': 11, 'y': 12, 'rows': [0b110, 0b101, 0b101, 0b110]},  # D
+    {'type': 'bars', 'metric': 'cpus_util', 'x': 1, 'y': 6, 'width': 4},
+    {'type': 'bar', 'metric': 'mem_used', 'x': 7, 'y': 6},
+    {'type': 'square', 'metric': 'disk_used', 'x': 10, 'y': 6},
+    {'type': 'bar', 'metric': 'cpu_t_level', 'x': 1, 'y': 0},
+    {'type': 'text', 'metric': 'cpu_t', 'level': 'cpu_t_level', 'x': 3, 'y': 0, 'width': 13},
+]
+
+#T° CPU seule: valeur en haut, historique en dessous
+TEMPERATURE = [
+    {'type': 'text', 'metric': 'cpu_t', 'level': 'cpu_t_level', 'x': 0, 'y': 11, 'width': 16},
+    {'type': 'sparkline', 'metric': 'cpu_t_level', 'x': 0, 'y': 0, 'width': 16, 'height': 10},
+]
+
+#entrées/sorties: occupation de chaque disque (D) et charge réseau (N)
+IO = [
+    {'type': 'title', 'metric': 'disk_io', 'x': 2, 'y': 12, 'rows': [0b110, 0b101, 0b101, 0b110]},    # D
+    {'type': 'title', 'metric': 'net_io', 'x': 11, 'y': 12, 'rows': [0b101, 0b111, 0b111, 0b101]},    # N
+    {'type': 'bars', 'metric': 'disks_io', 'x': 1, 'y': 0, 'width': 6, 'height': 10},
+    {'type': 'bar', 'metric': 'net_io', 'x': 9, 'y': 0, 'width': 6, 'height': 10},
+]
+
+LAYOUTS = {'dashboard': DASHBOARD, 'temperature': TEMPERATURE, 'io': IO}
+
+
+#graphe défilant d'une mesure sur toute la matrice
+#-------------------------------------------------
+def graph_layout(metric):
+    return [{'type': 'sparkline', 'metric': metric, 'x': 0, 'y': 0, 'width': 16, 'height': 16}]
+
+
+#liste de widgets d'une disposition: liste, nom d'une disposition de LAYOUTS ou chemin d'un fichier JSON
+#-------------------------------------------------------------------------------------------------------
+def load_layout(layout=None):
+    if layout is None:
+        return DASHBOARD
+    if isinstance(layout, str):
+        if layout in LAYOUTS:
+            return LAYOUTS[layout]
+        with open(layout) as f:
+            return json.load(f)
+    return layout
+
+
+#index des niveaux (%) dans les tables des widgets: dixièmes de %, bornés à 0..1000
+#---------------------------------------------------------------------------------
+def level_index(levels):
+    return numpy.clip(numpy.rint(numpy.asarray(levels, dtype=float)*10), 0, 1000).astype(int)
+
+#index d'un seul niveau (%), même arrondi que level_index
+#--------------------------------------------------------
+def level_index1(level):
+    return min(1000, max(0, int(round(level*10))))
+
+LEVELS = numpy.arange(1001)     # niveaux des tables en dixièmes de %
+
+
+#pixels (xs, ys) d'une zone width x height à partir de (x,y), colonne par colonne
+#--------------------------------------------------------------------------------
+def region(x, y, width, height):
+    return numpy.repeat(x + numpy.arange(width), height), numpy.tile(y + numpy.arange(height), width)
+
+
+#répartition des coeurs CPU sur les colonnes de la jauge CPU
+#un coeur par barre si possible, sinon les coeurs sont regroupés (moyenne) sur nb_cols barres
+#aucun coeur (ex: aucun disque trouvé pour 'disks_io'): une barre au niveau 0
+#-----------------------------------------------------------------------------------------
+class CpuLayout():
+    def __init__(self, nb_cpus, nb_cols=4):
+        self.nb_cpus = nb_cpus
+        self.nb_bars = min(max(1, nb_cpus), nb_cols)    # nb de barres affichées
+        self.width = nb_cols // self.nb_bars            # largeur d'une barre en colonnes
+        #matrice (barres x coeurs) de calcul des moyennes par groupe de coeurs
+        self.groups = numpy.zeros((self.nb_bars, nb_cpus))
+        for bar, cpus in enumerate(numpy.array_split(numpy.arange(nb_cpus), self.nb_bars)):
+            if len(cpus):
+                self.groups[bar, cpus] = 1/len(cpus)
+
+    #niveau (%) de chaque barre à partir de l'utilisation de chaque coeur
+    #---------------------------------------------------------------------
+    def levels(self, cpus_util):
+        return self.groups @ numpy.asarray(cpus_util, dtype=float)
+
+
+#widget de base: zone de pixels (xs, ys) et table lut[niveau] des couleurs de tous ses pixels
+#la couleur de chaque pixel pour chaque niveau (au dixième de %) est calculée une fois pour toutes
+#-----------------------------------------------------------------------------------------
+class Widget():
+    def __init__(self, uhhd, metric, x, y):
+        self.metric = metric        # champ de SysInfo affiché
+        self.colors = uhhd.colors   # ColorTable des niveaux
+        self.back = numpy.array(uhhd.c_gris_fonce, dtype=numpy.uint8)  # couleur de fond des jauges
+        self.x = x
+        self.y = y
+        self.xs = self.ys = None    # pixels du widget
+        self.lut = None             # couleurs des pixels (1001 niveaux x nb pixels x 3)
+
+    #couleurs des pixels avant le premier relevé
+    #-------------------------------------------
+    def background(self):
+        return self.lut[0]
+
+    #couleurs des pixels pour un relevé info (SysInfo)
+    #-------------------------------------------------
+    def draw(self, info):
+        return self.lut[level_index1(getattr(info, self.metric))]
+
+
+#jauge verticale: level/(100/height) pixels allumés, dégradé de luminosité du bas (-) vers le haut (+), fond gris
+#---------------------------------------------------------------------------------------------------------------
+class Bar(Widget):
+    def __init__(self, uhhd, metric, x, y, height=5, width=1):
+        super().__init__(uhhd, metric, x, y)
+        self.height = height
+        self.xs, self.ys = region(x, y, width, height)
+        self.lut = numpy.tile(self.columns(height), (1, width, 1))  # même colonne sur width colonnes
+
+    #couleurs (1001 niveaux x height x 3) d'une colonne de jauge
+    #-----------------------------------------------------------
+    def columns(self, height):
+        nb_p = LEVELS*height // 1000                # nb de palliers atteints
+        nb_on = -(-LEVELS*height // 1000)           # nb de pixels allumés
+        rows = numpy.arange(height)
+        steps = (rows[numpy.newaxis, :]+1)*self.colors.V_STEPS // (nb_p[:, numpy.newaxis]+1)
+        rgb = self.colors.rgb[self.colors.levels(LEVELS/10)[:, numpy.newaxis], numpy.minimum(steps, self.colors.V_STEPS)]
+        rgb[rows[numpy.newaxis, :] >= nb_on[:, numpy.newaxis]] = self.back     # pixels éteints: fond gris
+        return rgb
+
+
+#jauges verticales des coeurs CPU ou des disques sur width colonnes (CpuLayout), la mesure est un tuple de niveaux
+#----------------------------------------------------------------------------------------------------------------
+class Bars(Bar):
+    def __init__(self, uhhd, metric, x, y, width=4, height=5):
+        super().__init__(uhhd, metric, x, y, height)
+        self.width = width
+        self.xs, self.ys = region(x, y, width, height)
+        self.set_cpus(uhhd.nb_cpus)
+
+    #barre affichée dans chaque colonne (nb_bars: colonne inutilisée, niveau 0)
+    #-------------------------------------------------------------------------
+    def set_cpus(self, nb_cpus):
+        self.cpu_layout = CpuLayout(nb_cpus, self.width)
+        self.bars = numpy.full(self.width, self.cpu_layout.nb_bars)
+        self.bars[:self.cpu_layout.nb_bars*self.cpu_layout.width] = numpy.repeat(numpy.arange(self.cpu_layout.nb_bars), self.cpu_layout.width)
+        self.index = numpy.zeros(self.cpu_layout.nb_bars+1, dtype=int)  # niveaux des barres, suivi du niveau 0
+
+    def background(self):
+        return numpy.tile(self.lut[0], (self.width, 1))
+
+    def draw(self, info):
+        cpus_util = getattr(info, self.metric)
+        if len(cpus_util) != self.cpu_layout.nb_cpus:
+            self.set_cpus(len(cpus_util))
+        self.index[:-1] = level_index(self.cpu_layout.levels(cpus_util))
+        return self.lut[self.index[self.bars]].reshape(-1, 3)
+
+
+#jauge carrée size x size: une colonne pleine par tranche de 100/size %, dégradé gauche(-) vers droite(+)
+#puis un pixel par tranche supplémentaire de 100/size² % dans la colonne suivante, fond gris
+#-----------------------------------------------------------------------------------------
+class Square(Widget):
+    def __init__(self, uhhd, metric, x, y, size=5):
+        super().__init__(uhhd, metric, x, y)
+        self.xs, self.ys = region(x, y, size, size)
+        nb_c = LEVELS*size // 1000                  # nb de colonnes pleines
+        nb_l = (LEVELS*size % 1000)*size // 1000    # nb de pixels de la colonne suivante
+        cols = numpy.arange(size)[numpy.newaxis, :]
+        nb_c = nb_c[:, numpy.newaxis]
+        steps = numpy.where(cols < nb_c, (cols+1)*self.colors.V_STEPS // numpy.maximum(nb_c, 1), self.colors.V_STEPS)
+        rgb = self.colors.rgb[self.colors.levels(LEVELS/10)[:, numpy.newaxis], steps]   # couleur de chaque colonne
+        rgb = numpy.repeat(rgb[:, :, numpy.newaxis, :], size, axis=2)
+        on = (cols < nb_c)[:, :, numpy.newaxis] | ((cols == nb_c)[:, :, numpy.newaxis] &
+                                                    (numpy.arange(size) < nb_l[:, numpy.newaxis, numpy.newaxis]))
+        rgb[~on] = self.back        # pixels éteints: fond gris
+        self.lut = rgb.reshape(len(LEVELS), size*size, 3)
+
+
+#lettre 3x4 (titre) couleur du niveau à 70% de luminosité
+#--------------------------------------------------------
+class Title(Widget):
+    def __init__(self, uhhd, metric, x, y, rows):
+        super().__init__(uhhd, metric, x, y)
+        self.xs, self.ys = region(x, y, 3, len(rows))
+        #pixels allumés, colonne par colonne de bas en haut (rows: ligne du haut en premier)
+        mask = numpy.array([[(n3b >> (2-i)) & 1 for n3b in reversed(rows)] for i in range(3)], dtype=bool).ravel()
+        self.lut = numpy.zeros((len(LEVELS), len(mask), 3), dtype=numpy.uint8)
+        self.lut[:, mask] = self.colors.rgb[self.colors.levels(LEVELS/10), self.colors.step(0.7)][:, numpy.newaxis, :]
+
+
+#valeur de la mesure en chiffres 5x3 sur width colonnes, couleur du niveau de la mesure level
+#--------------------------------------------------------------------------------------------
+class Text(Widget):
+    def __init__(self, uhhd, metric, x, y, width=13, level=None, format='{}'):
+        super().__init__(uhhd, metric, x, y)
+        self.msg = uhhd.msg
+        self.width = width
+        self.level = metric if level is None else level     # mesure donnant la couleur du texte
+        self.format = format
+        self.xs, self.ys = region(x, y, width, 5)
+        self.black = numpy.zeros((width*5, 3), dtype=numpy.uint8)
+
+    def background(self):
+        return self.black
+
+    def draw(self, info):
+        mask = self.msg.render(self.format.format(getattr(info, self.metric)), self.width)  # masque en cache
+        c = self.colors.color(getattr(info, self.level))
+        return numpy.where(mask.reshape(-1, 1), c, self.black)
+
+
+#graphe défilant: une colonne par relevé, la plus récente à droite
+#hauteur de chaque colonne proportionnelle au niveau (0 à 100%), couleur du niveau
+#chaque relevé décale les colonnes affichées d'un cran. Si des relevés ont été remplacés avant d'être affichés
+#(uhhd.stats.nb_dropped), les colonnes sont reconstruites à partir de l'historique de la mesure
+#(RingBuffer de ReadSys, uhhd.history) pour que le graphe n'ait pas de trous
+#-----------------------------------------------------------------------------------------
+class Sparkline(Widget):
+    def __init__(self, uhhd, metric, x, y, width=16, height=16):
+        super().__init__(uhhd, metric, x, y)
+        self.width = width
+        self.xs, self.ys = region(x, y, width, height)
+        nb_on = -(-LEVELS*height // 1000)           # nb de pixels allumés
+        on = numpy.arange(height)[numpy.newaxis, :] < nb_on[:, numpy.newaxis]
+        self.lut = numpy.zeros((len(LEVELS), height, 3), dtype=numpy.uint8)
+        rgb = self.colors.rgb[self.colors.levels(LEVELS/10), self.colors.V_STEPS]
+        self.lut[on] = numpy.repeat(rgb, nb_on, axis=0)    # pixels allumés de chaque niveau, du bas vers le haut
+        self.cols = numpy.zeros((width, height, 3), dtype=numpy.uint8)  # colonnes affichées
+        self.history = uhhd.history.get(metric)     # historique de la mesure tenu par ReadSys (None: aucun)
+        self.stats = uhhd.stats                     # compteur des relevés jamais affichés (None: aucun)
+        if self.stats is None:
+            self.history = None                     # aucun relevé perdu: le décalage suffit
+        self.nb_dropped = 0 if self.stats is None else self.stats.nb_dropped
+
+    def background(self):
+        self.cols.fill(0)
+        return self.cols.reshape(-1, 3)
+
+    #décale le graphe d'une colonne vers la gauche (nouveau relevé)
+    #relevés remplacés avant d'être affichés: colonnes des relevés précédents relues dans l'historique
+    #-----------------------------------------------------------------------------------------------
+    def advance(self):
+        if self.history is not None and self.stats.nb_dropped != self.nb_dropped:
+            self.nb_dropped = self.stats.nb_dropped
+            values = self.history.values()[-self.width:-1]     # relevés précédents, le plus récent exclu
+            start = self.width - 1 - len(values)
+            self.cols[:start] = 0
+            self.cols[start:-1] = self.lut[level_index(values)]
+        else:
+            self.cols[:-1] = self.cols[1:]
+
+    def draw(self, info):
+        self.cols[-1] = self.lut[level_index1(getattr(info, self.metric))]
+        return self.cols.reshape(-1, 3)
+
+
+WIDGETS = {'bar': Bar, 'bars': Bars, 'square': Square, 'title': Title, 'text': Text, 'sparkline': Sparkline}
+
+
+#disposition compilée: pixels de tous les widgets concaténés (xs, ys), couleurs calculées dans un seul tableau
+#puis copiées dans l'image hors écran en une seule opération
+#ValueError si un widget déborde de la matrice
+#-----------------------------------------------------------------------------------------
+class Layout():
+    def __init__(self, uhhd, layout=None):
+        self.fb = uhhd.fb
+        self.widgets = []
+        for spec in load_layout(layout):
+            options = dict(spec)
+            widget = WIDGETS[options.pop('type')](uhhd, **options)
+            if len(widget.xs) and (widget.xs.min() < 0 or widget.xs.max() >= self.fb.width or
+                                   widget.ys.min() < 0 or widget.ys.max() >= self.fb.height):
+                raise ValueError('widget hors de la matrice %dx%d: %s' % (self.fb.width, self.fb.height, spec))
+            self.widgets.append(widget)
+        sizes = [len(w.xs) for w in self.widgets]
+        ends = numpy.cumsum(sizes)
+        self.slices = [slice(end-size, end) for size, end in zip(sizes, ends)]  # pixels de chaque widget
+        none = [numpy.zeros(0, dtype=int)]     # disposition vide: aucun pixel (matrice réservée à l'appelant)
+        self.xs = numpy.concatenate([w.xs for w in self.widgets] or none)
+        self.ys = numpy.concatenate([w.ys for w in self.widgets] or none)
+        self.rgb = numpy.zeros((len(self.xs), 3), dtype=numpy.uint8)
+        self.scrolling = [w for w in self.widgets if isinstance(w, Sparkline)]  # widgets décalés à chaque relevé
+
+    #fonds des widgets avant le premier relevé
+    #-----------------------------------------
+    def background(self):
+        for widget, s in zip(self.widgets, self.slices):
+            self.rgb[s] = widget.background()
+        self.fb.buf[self.xs, self.ys] = self.rgb
+
+    #dessine un relevé info (SysInfo) dans l'image hors écran
+    #advance=False: image intermédiaire d'une transition, les graphes défilants ne sont pas décalés
+    #---------------------------------------------------------------------------------------------
+    def draw(self, info, advance=True):
+        if advance:
+            for widget in self.scrolling:
+                widget.advance()
+        for widget, s in zip(self.widgets, self.slices):
+            self.rgb[s] = widget.draw(info)
+        self.fb.buf[self.xs, self.ys] = self.rgb
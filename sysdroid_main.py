@@ -5,86 +5,137 @@
 # auther      : papsdroid
 # modification: 2019/09/18
 ########################################################################
-import time, os, unicornhathd
-import threading
-import psutil
+import time, os
+import threading, collections
 from sysdroid_UHHD import SysDroid_uhhd
+from sysdroid_collect import SysFile, CpuTimes, MemInfo, DiskUsage, DiskIO, NetIO, RingBuffer, AdaptiveDelay
+from sysdroid_stats import Stats, StatsServer
+
+#relevé des informations système publié par ReadSys (immuable)
+#  cpu_t: température du CPU, cpu_t_level: % T°CPU 0%: <=t_min, 100%: >= t_max
+#  cpu_util: CPU global (%), cpus_util: tuple utilisation de chaque CPU (%)
+#  mem_used: mémoire physique utilisée (%), disk_used: usage du disk à la racine ('/') en %
+#  disks_io: tuple occupation de chaque disque (%), disk_io: occupation du disque le plus chargé (%)
+#  net_io: charge réseau (%) de l'interface la plus chargée par rapport à sa vitesse
+#-----------------------------------------------------------------------------------------
+SysInfo = collections.namedtuple('SysInfo', ['cpu_t', 'cpu_t_level', 'cpu_util', 'cpus_util', 'mem_used', 'disk_used',
+                                             'disks_io', 'disk_io', 'net_io'])
+HISTORY_FIELDS = ('cpu_t', 'cpu_t_level', 'cpu_util', 'mem_used', 'disk_used', 'disk_io', 'net_io')  # mesures historisées par ReadSys (graphes défilants)
 
 
 #classe affichage infos système (via thread)
 #-----------------------------------------------------------------------------------------
 class SysDroid(threading.Thread):
-    def __init__(self, verbose, delay, rotation):     
+    def __init__(self, verbose, delay, rotation, graph=None, display=None, delay_max=None, thresholds=None, layout=None, fps=0):     
         threading.Thread.__init__(self)  # appel au constructeur de la classe mère Thread
         self.etat=False             # état du thread False(non démarré), True (démarré)
         self.verbose = verbose      # True: active les print
         self.delay = delay          # délais en secondes de rafraichissement des infos systèmes
         self.rotation = rotation    # angle d'affichage sur la matrice UHHD (mutliple de 90°)
         print ('Sysdroid démarre ... ')
-        self.uhhd = SysDroid_uhhd(rotation)       # matrice de leds UHHD
-        self.readsys = ReadSys(verbose, delay)    # thread de lecture des informations système 
+        self.stats = Stats()        # mesures du coût de sysdroid
+        self.readsys = ReadSys(verbose, delay, stats=self.stats, delay_max=delay_max, thresholds=thresholds)    # thread de lecture des informations système 
+        self.uhhd = SysDroid_uhhd(rotation, animation=False, nb_cpus=self.readsys.nb_cpus, graph=graph, display=display, layout=layout, fps=fps, history=self.readsys.history, stats=self.stats)  # matrice de leds UHHD, animations jouées par run()
         self.readsys.start()              # démarrage du thread de lecture des info systèmes
        
     #exécution du thread
     #-------------------
     def run(self):
         self.etat=True
+        info = None
+        #animation de démarrage, interrompue dès le premier relevé
+        for _ in self.uhhd.frames_start():
+            info = self.readsys.get_info(self.uhhd.frame_delay)  # attente d'un relevé pendant une image
+            if info is not None or not(self.etat):
+                break
+        if self.etat:
+            self.uhhd.draw_background()
         while (self.etat):
-            if not(self.readsys.infoLues):
-                self.uhhd.draw_title_P(self.uhhd.hue_level(self.readsys.cpu_util))
-                self.uhhd.draw_level(self.readsys.cpus_util[0],1,6) #niveau CPU[0]
-                self.uhhd.draw_level(self.readsys.cpus_util[1],2,6) #niveau CPU[1]
-                self.uhhd.draw_level(self.readsys.cpus_util[2],3,6) #niveau CPU[2]
-                self.uhhd.draw_level(self.readsys.cpus_util[3],4,6) #niveau CPU[3]
-                self.uhhd.draw_title_R(self.uhhd.hue_level(self.readsys.mem_used))
-                self.uhhd.draw_level(self.readsys.mem_used,7,6)     #niveau RAM
-                self.uhhd.draw_title_D(self.uhhd.hue_level(self.readsys.disk_used))
-                self.uhhd.draw_square_level(self.readsys.disk_used,10,6) #niveau disk
-                self.uhhd.draw_level(self.readsys.cpu_t_level,1,0)       #niveau cpu T° (0%: <=30, 100%:>=80°C)
-                self.uhhd.draw_T(self.readsys.cpu_t,self.uhhd.hue_level(self.readsys.cpu_t_level)) #affichage T° CPU
-                self.uhhd.show()
-                self.readsys.set_infoLues()
-            else:
-                time.sleep(0.5) # mise en pause (sinon proc saturé par boucle infinie)
-        
-    #arrêt du thread
-    #---------------
+            if info is not None:
+                self.uhhd.set_info(info)    # transition vers le nouveau relevé
+            t_next = time.monotonic()
+            while self.etat and self.uhhd.moving():     # une image par période tant que la transition continue
+                t0 = time.perf_counter()
+                self.stats.rendered(t0, self.uhhd.draw_frame())
+                t_next += self.uhhd.frame_period
+                while self.etat:            # attente de l'image suivante, un nouveau relevé relance la transition
+                    wait = t_next - time.monotonic()
+                    if wait <= 0:
+                        break
+                    info = self.readsys.get_info(wait)
+                    if info is None:
+                        break
+                    self.uhhd.set_info(info)
+            info = self.readsys.get_info()  # valeurs stables: attente (bloquante) d'un nouveau relevé, aucune image
+            if info is None:                # readsys arrêté
+                break
+        self.uhhd.stop()        # animation quitter et extinction de la matrice UHHD
+        print('Sysdroid arrêté')      
+
+    #arrêt du thread (non bloquant: l'animation quitter est jouée par le thread)
+    #---------------------------------------------------------------------------
     def stop(self):
         self.etat=False
-        self.readsys.stop()     # arret du thread readsys
-        self.uhhd.stop()        # extinction de la matrice UHHD
-        print('Sysdroid arrêté')      
+        self.readsys.stop()     # arret du thread readsys: débloque l'attente d'un relevé
+        if not(self.is_alive()):
+            self.uhhd.stop()    # thread non démarré: extinction de la matrice UHHD
+            print('Sysdroid arrêté')      
 
 
 #classe de lecture des informations systèmes à lire
 #-----------------------------------------------------------------------------------------
 class ReadSys(threading.Thread):
-    def __init__(self, verbose, delay):
+    def __init__(self, verbose, delay, disk_delay=300, history_size=16, stats=None, delay_max=None, thresholds=None):
         threading.Thread.__init__(self)  # appel au constructeur de la classe mère Thread
         self.verbose = verbose           # True active les print
         self.delay = delay               # délais en secondes entre chaque nouvelle lecture (30s par défaut)
         self.etat=False                  # état du thread False(non démarré), True (démarré)
         self.t_min = 40                  # température minimale (0% si en dessous)
         self.t_max = 80                  # température maximale (100% si au dessus)
+        #délais adaptatif entre delay et delay_max (None: délais fixe), voir AdaptiveDelay pour thresholds
+        self.adaptive = None if delay_max is None else AdaptiveDelay(delay, delay_max, thresholds, t_alert=self.t_max-5)
         self.cpu_t=0                     # température du CPU
-        self.cpu_t_level = 0             # % T°CPu 0%: <=t_min, 100%: >= t_max
-        self.cpu_util   = 0              # CPU global utilisation (%)
-        self.cpus_util  = [0,0,0,0]      # CPUs utilisation (%)
-        self.mem_used   = 0              # mémoire physique utilisée (%)
-        self.disk_used  = 0              # usage du disk à la racine ('/') en %
-        self.infoLues   = True           # True si les infos sont prises en compte, False sinon.
-
-    #mise à jour de la variable infoLues à True
-    #-------------------------------------------
-    def set_infoLues(self):
-        self.infoLues=True
+        self.temp_file = None            # fichier sysfs de la T° CPU, ouvert à la première lecture
+        self.cpu_times = CpuTimes()      # utilisation des CPUs (/proc/stat)
+        self.nb_cpus = self.cpu_times.nb_cpus  # nb de coeurs CPU, lu une fois au démarrage
+        self.history = {name: RingBuffer(history_size) for name in HISTORY_FIELDS}  # derniers relevés de chaque mesure
+        self.stats = Stats() if stats is None else stats    # mesures du coût de sysdroid
+        self.mem_info = MemInfo()        # mémoire utilisée (/proc/meminfo)
+        self.disk_usage = DiskUsage('/', disk_delay)  # usage du disk, relu toutes les disk_delay secondes
+        self.disk_io = DiskIO()          # occupation des disques (points de montage recherchés une fois)
+        self.net_io = NetIO()            # charge des interfaces réseau (recherchées une fois)
+        self.info = None                 # dernier relevé publié (SysInfo)
+        self.info_new = False            # True si le dernier relevé n'a pas encore été pris en compte
+        self.arret = False               # True une fois stop() appelé
+        self.cond = threading.Condition()  # signale la publication d'un relevé ou l'arrêt du thread
+
+    #publication d'un nouveau relevé (remplace le précédent s'il n'a pas été pris en compte)
+    #--------------------------------------------------------------------------------------
+    def publish(self, info):
+        with self.cond:
+            if self.info_new:
+                self.stats.dropped()    # relevé précédent jamais affiché
+            self.info = info
+            self.info_new = True
+            self.cond.notify_all()
+
+    #attente bloquante d'un nouveau relevé (timeout en secondes, sans limite si None)
+    #retourne le relevé, None si le thread est arrêté ou si aucun relevé n'est arrivé à temps
+    #----------------------------------------------------------------------------------------
+    def get_info(self, timeout=None):
+        with self.cond:
+            self.cond.wait_for(lambda: self.info_new or self.arret, timeout)
+            if not self.info_new:
+                return None
+            self.info_new = False
+            return self.info
 
     #lecture de la température CPU
     #-----------------------------
     def get_cpu_temp(self):     
-        tmp = open('/sys/class/thermal/thermal_zone0/temp')
-        cpu = tmp.read()
-        tmp.close()
+        if self.temp_file is None:
+            self.temp_file = SysFile('/sys/class/thermal/thermal_zone0/temp', 32)
+        cpu = self.temp_file.read()
         return(round(float(cpu)/1000,1))
 
     #converti la t° CPU en % entre t_min et t_max
@@ -93,6 +144,47 @@ class ReadSys(threading.Thread):
         return (float)(self.cpu_t-self.t_min)/(self.t_max-self.t_min)*100
     
    
+    #lecture des informations système (appel bloquant)
+    #-------------------------------------------------
+    def read_info(self):
+        t0 = time.perf_counter()
+        self.cpu_t = self.get_cpu_temp()
+        cpu_util, cpus_util = self.cpu_times.sample()   # une seule lecture de /proc/stat
+        disks_io = self.disk_io.sample()                # une seule lecture des compteurs de tous les disques
+        info = SysInfo(cpu_t = self.cpu_t,
+                       cpu_t_level = self.convert_cpu_pct(),
+                       cpu_util = cpu_util,
+                       cpus_util = cpus_util,
+                       mem_used = self.mem_info.used(),
+                       disk_used = self.disk_usage.used(),
+                       disks_io = disks_io,
+                       disk_io = max(disks_io, default=0.0),
+                       net_io = self.net_io.sample())
+        for name in HISTORY_FIELDS:
+            self.history[name].append(getattr(info, name))
+        self.stats.collected(t0)
+        return info
+
+    #délais avant le prochain relevé
+    #-------------------------------
+    def next_delay(self, info):
+        return self.delay if self.adaptive is None else self.adaptive.update(info)
+
+    #sonde légère entre 2 relevés (CPU global, mémoire, T°): True si un nouveau relevé est nécessaire
+    #-----------------------------------------------------------------------------------------------
+    def probe_changed(self):
+        return self.adaptive.changed({'cpu_util': self.cpu_times.probe(),
+                                      'mem_used': self.mem_info.used(),
+                                      'cpu_t': self.get_cpu_temp()})
+
+    #affichage console d'un relevé
+    #-----------------------------
+    def print_info(self, info):
+        print ('CPU:', info.cpu_util,'CPUs:', info.cpus_util,'% MEM used:',info.mem_used,'% CPU T°:', info.cpu_t,'°C', ' DISK:',info.disk_used,'%')
+        print ('DISK IO:', info.disks_io, '% (', ', '.join('%s %.0f ko/s' % (m, r/1000) for m, r in zip(self.disk_io.mounts, self.disk_io.rates)), ')',
+               'NET IO:', info.net_io, '% (', ', '.join('%s %.0f/%.0f ko/s' % (n, r[0]/1000, r[1]/1000) for n, r in zip(self.net_io.nics, self.net_io.rates)), ')')
+        print ('Sysdroid:', self.stats.snapshot('console'))  # part CPU propre à la console: ne fausse pas celle du serveur
+
     #démarrage du thread
     #-------------------
     def run(self):
@@ -101,29 +193,54 @@ class ReadSys(threading.Thread):
             print('Thread lecture info système démarré')
         while (self.etat):
             #lecture et stockage des informations système
-            self.cpu_t = self.get_cpu_temp()
-            self.cpu_t_level = self.convert_cpu_pct()
-            self.cpu_util = psutil.cpu_percent()
-            self.cpus_util = psutil.cpu_percent(percpu=True)
-            self.mem_used = psutil.virtual_memory()[2]
-            self.disk_used = psutil.disk_usage('/')[3]
-            self.infoLues = False
+            info = self.read_info()
+            self.publish(info)
             if self.verbose:
-                print ('CPU:', self.cpu_util,'CPUs:', self.cpus_util,'% MEM used:',self.mem_used,'% CPU T°:', self.cpu_t,'°C', ' DISK:',self.disk_used,'%')
-            time.sleep(self.delay)
+                self.print_info(info)
+            t_next = time.monotonic() + self.next_delay(info)
+            while self.etat:
+                wait = t_next - time.monotonic()
+                if wait <= 0:
+                    break
+                if self.adaptive is None:
+                    self.pause(wait)
+                else:   #attente par pas de delay (min), interrompue si la sonde détecte une variation
+                    self.pause(min(wait, self.delay))
+                    if self.etat and self.probe_changed():
+                        break
+
+    #attente de delay secondes avant la lecture suivante, interrompue par stop()
+    #---------------------------------------------------------------------------
+    def pause(self, delay):
+        with self.cond:
+            self.cond.wait_for(lambda: self.arret, delay)
 
     #arrêt du thread
     #----------------
     def stop(self):
         self.etat=False
+        with self.cond:
+            self.arret = True
+            self.cond.notify_all()
         if self.verbose:
             print('Thread lecture info système stoppé')
 
 #classe application principale
 #------------------------------------------------------------------------------
 class Application():
-    def __init__(self, verbose=False, delay=30, rotation=0):
-        self.sysdroid = SysDroid(verbose, delay, rotation) 
+    def __init__(self, verbose=False, delay=30, rotation=0, graph=None, display=None, stats_endpoint=None, delay_max=None, thresholds=None, layout=None, fps=25):
+        #delay_max: délais adaptatif entre delay (mesures qui varient) et delay_max (mesures stables), délais fixe si None
+        #thresholds: variations déclenchant le retour à delay (défaut: AdaptiveDelay.THRESHOLDS)
+        #graph: None (tableau de bord) ou mesure affichée en graphe défilant ('cpu_util', 'mem_used', 'cpu_t_level', 'disk_used')
+        #layout: disposition des widgets (sysdroid_layout): liste, nom ('dashboard', 'temperature', 'io') ou fichier JSON
+        #fps: images par seconde max des transitions adoucies entre 2 relevés (0: affichage direct)
+        #display: afficheur (sysdroid_display), Unicorn HAT HD si None
+        #stats_endpoint: None, chemin d'une socket Unix ou port HTTP local publiant les statistiques de sysdroid
+        self.sysdroid = SysDroid(verbose, delay, rotation, graph, display, delay_max, thresholds, layout, fps) 
+        self.stats_server = None
+        if stats_endpoint is not None:
+            self.stats_server = StatsServer(self.sysdroid.stats, stats_endpoint)
+            self.stats_server.start()
         self.sysdroid.start()   # démarrage du thread de surveillance système
      	
     def loop(self):
@@ -133,10 +250,12 @@ class Application():
 
     def destroy(self):          # fonction exécutée sur appui CTRL-C
         self.sysdroid.stop()    # arrêt du thread de surveillance système       
+        if self.stats_server is not None:
+            self.stats_server.stop()
 
 
 if __name__ == '__main__':     # Program start from here
-    appl=Application(verbose=False, delay=1, rotation=90)  
+    appl=Application(verbose=False, delay=1, delay_max=30, rotation=90)  
     try:
         appl.loop()
     except KeyboardInterrupt:  # When 'Ctrl+C' is pressed, the child program destroy() will be  executed.
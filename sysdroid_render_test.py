@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_render_test.py
+# Description : tests de non régression de l'affichage sur matrice simulée (SimDisplay)
+#               le tableau de bord est comparé au rendu pixel par pixel d'origine (colorsys)
+#               usage: python -m pytest -q sysdroid_render_test.py
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import colorsys, random
+import numpy, pytest
+from sysdroid_main import SysInfo
+from sysdroid_UHHD import SysDroid_uhhd, Msg
+from sysdroid_display import SimDisplay
+from sysdroid_collect import RingBuffer
+from sysdroid_stats import Stats
+
+T_MIN, T_MAX = 40, 80
+TOLERANCE = 6       # écart max par composante: la table des couleurs arrondit le niveau au % près
+
+
+#relevés reproductibles (T° entre T_MIN et T_MAX, niveaux au dixième de %)
+#-------------------------------------------------------------------------
+def readings(n, nb_cpus=4, seed=3):
+    rnd = random.Random(seed)
+    infos = []
+    for _ in range(n):
+        cpus = tuple(round(rnd.uniform(0, 100), 1) for _ in range(nb_cpus))
+        t = round(rnd.uniform(T_MIN, T_MAX), 1)
+        disks_io = (round(rnd.uniform(0, 100), 1),)
+        infos.append(SysInfo(t, (t-T_MIN)/(T_MAX-T_MIN)*100, round(sum(cpus)/nb_cpus, 1), cpus,
+                             round(rnd.uniform(0, 100), 1), round(rnd.uniform(0, 100), 1),
+                             disks_io, max(disks_io), round(rnd.uniform(0, 100), 1)))
+    return infos
+
+
+#rendu d'origine du tableau de bord (set_pixel_hsv d'unicornhathd pixel par pixel) dans un tableau 16x16x3
+#-----------------------------------------------------------------------------------------
+class Reference():
+    def __init__(self):
+        self.buf = numpy.zeros((16, 16, 3), dtype=int)
+        self.gris = [20, 20, 10]
+        self.msg = Msg()
+
+    def hue(self, level):
+        return 0.33 + level/100*(1.0-0.33)
+
+    def set_pixel_hsv(self, x, y, h, v=1.0):
+        self.buf[x, y] = [int(c*255) for c in colorsys.hsv_to_rgb(h, 1.0, v)]
+
+    def horiz_3b(self, n3b, x, y, h):
+        for c in range(3):
+            if (n3b >> (2-c)) & 1:
+                self.set_pixel_hsv(x+c, y, h, 0.7)
+            else:
+                self.buf[x+c, y] = 0
+
+    def title(self, rows, x, h):
+        for i, n3b in enumerate(rows):
+            self.horiz_3b(n3b, x, 15-i, h)
+
+    def level(self, level, x, y):
+        nb_p = int(level/20)
+        for i in range(5):
+            self.buf[x, y+i] = self.gris
+            if level/20 > i:
+                self.set_pixel_hsv(x, y+i, self.hue(level), (i+1)/(1+nb_p))
+
+    def square(self, level, x, y):
+        nb_c = int(level/20)
+        nb_l = int((level % 20)/4)
+        self.buf[x:x+5, y:y+5] = self.gris
+        for c in range(nb_c):
+            for l in range(5):
+                self.set_pixel_hsv(c+x, l+y, self.hue(level), (c+1)/nb_c)
+        for l in range(nb_l):
+            self.set_pixel_hsv(nb_c+x, l+y, self.hue(level))
+
+    def temperature(self, t, level):
+        codes = self.msg.create_msg(str(t))
+        for i in range(13):
+            n5b = codes[i] if i < len(codes) else 0
+            for l in range(5):
+                if (n5b >> (4-l)) & 1:
+                    self.set_pixel_hsv(3+i, 4-l, self.hue(level))
+                else:
+                    self.buf[3+i, 4-l] = 0
+
+    def draw(self, info):
+        self.title([0b110, 0b101, 0b110, 0b100], 1, self.hue(info.cpu_util))
+        for i, level in enumerate(info.cpus_util):
+            self.level(level, 1+i, 6)
+        self.title([0b110, 0b101, 0b110, 0b101], 6, self.hue(info.mem_used))
+        self.level(info.mem_used, 7, 6)
+        self.title([0b110, 0b101, 0b101, 0b110], 11, self.hue(info.disk_used))
+        self.square(info.disk_used, 10, 6)
+        self.level(info.cpu_t_level, 1, 0)
+        self.temperature(info.cpu_t, info.cpu_t_level)
+        return self.buf
+
+
+#écart max par composante entre l'image affichée et le rendu d'origine
+#----------------------------------------------------------------------
+def max_error(display, reference):
+    return int(numpy.abs(display.buf.astype(int) - reference).max())
+
+
+def test_dashboard_matches_reference():
+    display = SimDisplay()
+    uhhd = SysDroid_uhhd(0, animation=False, display=display)
+    uhhd.draw_background()
+    reference = Reference()
+    for info in readings(1000):
+        uhhd.draw_info(info)
+        assert max_error(display, reference.draw(info)) <= TOLERANCE, info
+
+
+def test_transition_ends_on_reading():
+    #dernière image d'une transition identique à l'affichage direct du relevé
+    infos = readings(20)
+    direct = SysDroid_uhhd(0, animation=False, display=SimDisplay())
+    eased = SysDroid_uhhd(0, animation=False, display=SimDisplay(), fps=25)
+    for info in infos:
+        direct.draw_info(info)
+        eased.set_info(info)
+        while eased.moving():
+            eased.draw_frame()
+        assert numpy.array_equal(direct.display.buf, eased.display.buf)
+
+
+def test_unchanged_reading_not_shown():
+    display = SimDisplay()
+    uhhd = SysDroid_uhhd(0, animation=False, display=display)
+    info = readings(1)[0]
+    assert uhhd.draw_info(info)
+    nb_show = display.nb_show
+    assert not uhhd.draw_info(info)
+    assert display.nb_show == nb_show
+
+
+def test_layout_outside_panel():
+    #widget débordant de la matrice: erreur à la compilation de la disposition, pas au premier affichage
+    layout = [{'type': 'bar', 'metric': 'mem_used', 'x': 14, 'y': 12, 'width': 3}]
+    with pytest.raises(ValueError):
+        SysDroid_uhhd(0, animation=False, display=SimDisplay(), layout=layout)
+
+
+def test_no_disk_found():
+    #aucun disque associé aux points de montage (conteneur, racine overlay): jauges au niveau de fond
+    display = SimDisplay()
+    uhhd = SysDroid_uhhd(0, animation=False, display=display, layout='io')
+    uhhd.draw_background()
+    background = display.buf.copy()
+    info = readings(1)[0]._replace(disks_io=(), disk_io=0.0, net_io=0.0)
+    uhhd.draw_info(info)
+    widget = uhhd.layout.widgets[2]     # jauges 'disks_io'
+    assert numpy.array_equal(display.buf[widget.xs, widget.ys], background[widget.xs, widget.ys])
+    uhhd.draw_info(readings(1)[0])      # disque trouvé ensuite: une barre par disque
+    assert not numpy.array_equal(display.buf[widget.xs, widget.ys], background[widget.xs, widget.ys])
+
+
+def test_sparkline_resync_after_dropped_reading():
+    #relevé remplacé avant d'être affiché: le graphe défilant le reprend dans l'historique de ReadSys
+    history = {'cpu_util': RingBuffer(16)}
+    stats = Stats()
+    scrolled = SysDroid_uhhd(0, animation=False, display=SimDisplay(), graph='cpu_util')
+    synced = SysDroid_uhhd(0, animation=False, display=SimDisplay(), graph='cpu_util', history=history, stats=stats)
+    infos = readings(20)
+    for i, info in enumerate(infos):
+        history['cpu_util'].append(info.cpu_util)
+        if i == 10:
+            stats.dropped()     # relevé jamais affiché
+            continue
+        scrolled.draw_info(info)
+        synced.draw_info(info)
+        if i < 10:
+            assert numpy.array_equal(scrolled.display.buf, synced.display.buf)
+    #graphe sans historique: le relevé perdu manque; avec historique: identique à l'affichage de tous les relevés
+    direct = SysDroid_uhhd(0, animation=False, display=SimDisplay(), graph='cpu_util')
+    for info in infos:
+        direct.draw_info(info)
+    assert not numpy.array_equal(scrolled.display.buf, direct.display.buf)
+    assert numpy.array_equal(synced.display.buf, direct.display.buf)
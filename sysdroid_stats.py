@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+########################################################################
+# Filename    : sysdroid_stats.py
+# Description : mesures du coût de sysdroid lui-même (lecture, affichage, mémoire, CPU)
+#               consultables par snapshot() ou par socket Unix / HTTP locale
+# auther      : papsdroid
+# modification: 2019/09/18
+########################################################################
+import os, time, json, threading
+import socketserver, http.server
+import psutil
+
+
+#compteurs de fonctionnement: simples additions à chaque relevé / image,
+#toutes les valeurs dérivées (moyennes, RSS, part CPU) ne sont calculées que par snapshot()
+#-----------------------------------------------------------------------------------------
+class Stats():
+    def __init__(self):
+        self.t_start = time.monotonic()
+        self.nb_collect = 0         # nb de relevés
+        self.collect_time = 0.0     # durée cumulée des relevés (s)
+        self.collect_max = 0.0      # durée max d'un relevé (s)
+        self.nb_frame = 0           # nb d'images calculées (plusieurs par relevé pendant une transition)
+        self.frame_time = 0.0       # durée cumulée du calcul des images (s)
+        self.frame_max = 0.0        # durée max du calcul d'une image (s)
+        self.nb_show = 0            # nb d'images envoyées à la matrice
+        self.nb_dedup = 0           # nb d'images identiques à la précédente, non envoyées
+        self.nb_dropped = 0         # nb de relevés remplacés par le suivant avant d'être affichés
+        self.process = None         # psutil.Process, créé à la première lecture
+        self.start_cpu = (self.t_start, self.cpu_time())  # (heure, temps CPU du process) à la création
+        self.last_cpu = {}          # (heure, temps CPU du process) du snapshot précédent de chaque lecteur
+
+    #temps CPU (user + system) consommé par le process en secondes
+    #-------------------------------------------------------------
+    def cpu_time(self):
+        t = os.times()
+        return t.user + t.system
+
+    #fin d'un relevé commencé à t0 (time.perf_counter)
+    #--------------------------------------------------
+    def collected(self, t0):
+        dt = time.perf_counter() - t0
+        self.nb_collect += 1
+        self.collect_time += dt
+        if dt > self.collect_max:
+            self.collect_max = dt
+
+    #fin du calcul d'une image commencé à t0: shown=True si l'image a été envoyée à la matrice
+    #-----------------------------------------------------------------------------------------
+    def rendered(self, t0, shown):
+        dt = time.perf_counter() - t0
+        self.nb_frame += 1
+        self.frame_time += dt
+        if dt > self.frame_max:
+            self.frame_max = dt
+        if shown:
+            self.nb_show += 1
+        else:
+            self.nb_dedup += 1
+
+    #relevé non affiché (remplacé par un plus récent)
+    #------------------------------------------------
+    def dropped(self):
+        self.nb_dropped += 1
+
+    #état des compteurs et consommation du process (dict)
+    #part CPU: % d'un coeur utilisé depuis le snapshot précédent du même lecteur (reader: serveur, console...)
+    #depuis la création de Stats au premier appel de ce lecteur
+    #--------------------------------------------------------------------------------------------------
+    def snapshot(self, reader=None):
+        if self.process is None:
+            self.process = psutil.Process()
+        now = time.monotonic()
+        cpu = self.cpu_time()
+        t_last, cpu_last = self.last_cpu.get(reader, self.start_cpu)
+        self.last_cpu[reader] = (now, cpu)
+        return {
+            'uptime': round(now - self.t_start, 1),
+            'collect_count': self.nb_collect,
+            'collect_avg_ms': round(1000*self.collect_time/self.nb_collect, 3) if self.nb_collect else 0.0,
+            'collect_max_ms': round(1000*self.collect_max, 3),
+            'frame_count': self.nb_frame,
+            'frame_avg_ms': round(1000*self.frame_time/self.nb_frame, 3) if self.nb_frame else 0.0,
+            'frame_max_ms': round(1000*self.frame_max, 3),
+            'frames_shown': self.nb_show,
+            'frames_dedup': self.nb_dedup,
+            'samples_dropped': self.nb_dropped,
+            'rss_kb': self.process.memory_info().rss // 1024,
+            'cpu_pct': round(100*(cpu - cpu_last)/(now - t_last), 2) if now > t_last else 0.0,
+        }
+
+
+#serveur des statistiques dans un thread du process (daemon)
+#  endpoint: chemin d'une socket Unix ('/run/sysdroid.sock'), ou port HTTP local (8765, écoute sur 127.0.0.1)
+#  chaque connexion reçoit le snapshot au format JSON
+#-----------------------------------------------------------------------------------------
+class StatsServer():
+    def __init__(self, stats, endpoint):
+        self.stats = stats
+        self.endpoint = endpoint
+        if isinstance(endpoint, int):
+            self.server = http.server.HTTPServer(('127.0.0.1', endpoint), self.http_handler())
+        else:
+            if os.path.exists(endpoint):
+                os.unlink(endpoint)     # socket d'une exécution précédente
+            self.server = socketserver.UnixStreamServer(endpoint, self.unix_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if not isinstance(self.endpoint, int) and os.path.exists(self.endpoint):
+            os.unlink(self.endpoint)
+
+    def json(self):
+        return (json.dumps(self.stats.snapshot()) + '\n').encode()
+
+    def unix_handler(self):
+        server = self
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.sendall(server.json())
+        return Handler
+
+    def http_handler(self):
+        server = self
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.json()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):   # pas de log à chaque requête
+                pass
+        return Handler